@@ -4,6 +4,7 @@ import json
 from datetime import datetime
 
 from app.core.database import get_db
+from app.core import user_stats_cache
 from app.api.routes.auth import get_current_user
 from app.models.schemas import (
     BadgeResponse,
@@ -80,6 +81,7 @@ class BadgeService:
                     "tokens": {"increment": badge.tokenReward}
                 }
             )
+            user_stats_cache.invalidate_user_stats(user_id)
             
             return {
                 "success": True,
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Query
 from typing import List, Optional
-from geopy.distance import geodesic
 
 from app.core.database import get_db
+from app.core.geo import haversine_m
 from app.api.routes.auth import get_current_user
 from app.models.schemas import (
     CityCreate,
@@ -42,13 +42,10 @@ async def get_cities(
     
     # If user location provided, filter by radius and sort by distance
     if latitude is not None and longitude is not None:
-        user_location = (latitude, longitude)
-        
         # Calculate distances and filter by radius
         cities_with_distance = []
         for city in cities:
-            city_location = (city.latitude, city.longitude)
-            distance = geodesic(user_location, city_location).kilometers
+            distance = haversine_m(latitude, longitude, city.latitude, city.longitude) / 1000
             
             if radius_km is None or distance <= radius_km:
                 cities_with_distance.append((city, distance))
@@ -1,7 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi.responses import ORJSONResponse, Response
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
+from dataclasses import dataclass
+import asyncio
 import hashlib
+import json
+import time
+import numpy as np
+import orjson
 
 from app.core.database import get_db
 from app.api.routes.auth import get_current_user
@@ -16,6 +23,143 @@ from app.models.schemas import (
 
 router = APIRouter()
 
+# Period boundaries only move at midnight, so cache them per (period, date)
+_period_cache: Dict[tuple, datetime] = {}
+
+# Serialized /competitions payload as (expires_at, body)
+COMPETITIONS_CACHE_TTL_SECONDS = 60
+_competitions_cache: Optional[tuple] = None
+
+# Only the User columns leaderboards actually read (skips the JSON preference blobs)
+LEADERBOARD_USER_FIELDS = {
+    "id": True,
+    "username": True,
+    "email": True,
+    "profileImageUrl": True,
+    "level": True,
+    "privacySettings": True,
+    "totalXP": True,
+    "streakDays": True
+}
+
+@dataclass(slots=True)
+class LeaderboardRow:
+    """Formatted leaderboard entry (serialized natively by orjson)"""
+    rank: int
+    user: Dict[str, Any]
+    score: int
+    is_current_user: bool
+
+# Leaderboard statements keep one fixed text and parameter shape
+# ($1 period start, $2 friend ids, $3 city id, $4 limit, $5 offset) so the
+# query engine's prepared-statement cache and Postgres reuse a single plan;
+# filters that don't apply are bound as NULL instead of being left out.
+XP_PERIOD_LEADERBOARD_SQL = '''
+SELECT qp."userId" AS "userId",
+       SUM(q."xpReward")::int AS score,
+       RANK() OVER (ORDER BY SUM(q."xpReward") DESC)::int AS rank
+FROM "quest_progress" qp
+JOIN "quests" q ON q."id" = qp."questId"
+WHERE qp."status" = 'completed'
+  AND ($1::timestamp IS NULL OR qp."completedAt" >= $1::timestamp)
+  AND ($2::text[] IS NULL OR qp."userId" = ANY($2::text[]))
+  AND ($3::text IS NULL OR q."cityId" = $3::text)
+GROUP BY qp."userId"
+HAVING SUM(q."xpReward") > 0
+ORDER BY score DESC, qp."userId"
+LIMIT $4 OFFSET $5
+'''
+
+BADGE_LEADERBOARD_SQL = '''
+SELECT ub."userId" AS "userId",
+       COUNT(*)::int AS score,
+       RANK() OVER (ORDER BY COUNT(*) DESC)::int AS rank
+FROM "user_badges" ub
+WHERE ($1::timestamp IS NULL OR ub."mintedAt" >= $1::timestamp)
+  AND ($2::text[] IS NULL OR ub."userId" = ANY($2::text[]))
+  AND ($3::text IS NULL OR EXISTS (
+      -- Badges that are rewarded by at least one quest in the city
+      SELECT 1 FROM "_QuestBadgeRewards" qbr
+      JOIN "quests" q ON q."id" = qbr."B"
+      WHERE qbr."A" = ub."badgeId" AND q."cityId" = $3::text
+  ))
+GROUP BY ub."userId"
+ORDER BY score DESC, ub."userId"
+LIMIT $4 OFFSET $5
+'''
+
+QUEST_LEADERBOARD_SQL = '''
+SELECT qp."userId" AS "userId",
+       COUNT(*)::int AS score,
+       RANK() OVER (ORDER BY COUNT(*) DESC)::int AS rank
+FROM "quest_progress" qp
+JOIN "quests" q ON q."id" = qp."questId"
+WHERE qp."status" = 'completed'
+  AND ($1::timestamp IS NULL OR qp."completedAt" >= $1::timestamp)
+  AND ($2::text[] IS NULL OR qp."userId" = ANY($2::text[]))
+  AND ($3::text IS NULL OR q."cityId" = $3::text)
+GROUP BY qp."userId"
+ORDER BY score DESC, qp."userId"
+LIMIT $4 OFFSET $5
+'''
+
+# Lifetime XP and streaks rank a users column directly
+# ($1 friend ids, $2 city id, $3 limit, $4 offset). The friend list is bound
+# as one text[] array so the statement text doesn't grow with the list.
+XP_ALL_TIME_LEADERBOARD_SQL = '''
+SELECT u."id" AS "userId",
+       u."totalXP" AS score,
+       ROW_NUMBER() OVER (ORDER BY u."totalXP" DESC, u."id")::int AS rank
+FROM "users" u
+WHERE u."totalXP" > 0
+  AND ($1::text[] IS NULL OR u."id" = ANY($1::text[]))
+  AND ($2::text IS NULL OR EXISTS (
+      -- Users with a completed quest in the city
+      SELECT 1 FROM "quest_progress" qp
+      JOIN "quests" q ON q."id" = qp."questId"
+      WHERE qp."userId" = u."id" AND qp."status" = 'completed' AND q."cityId" = $2::text
+  ))
+ORDER BY u."totalXP" DESC, u."id"
+LIMIT $3 OFFSET $4
+'''
+
+STREAK_LEADERBOARD_SQL = '''
+SELECT u."id" AS "userId",
+       u."streakDays" AS score,
+       ROW_NUMBER() OVER (ORDER BY u."streakDays" DESC, u."id")::int AS rank
+FROM "users" u
+WHERE u."streakDays" > 0
+  AND ($1::text[] IS NULL OR u."id" = ANY($1::text[]))
+  AND ($2::text IS NULL OR EXISTS (
+      -- Users with a completed quest in the city
+      SELECT 1 FROM "quest_progress" qp
+      JOIN "quests" q ON q."id" = qp."questId"
+      WHERE qp."userId" = u."id" AND qp."status" = 'completed' AND q."cityId" = $2::text
+  ))
+ORDER BY u."streakDays" DESC, u."id"
+LIMIT $3 OFFSET $4
+'''
+
+def position_statement(board_sql: str, user_param: int) -> str:
+    """
+    One user's rank and score on a leaderboard statement, with the board's total
+    participants. The board runs unpaged (a NULL limit is LIMIT ALL) so ranks and
+    totals cover every participant; the row is returned even when the user isn't ranked
+    """
+    return f'''
+WITH board AS ({board_sql})
+SELECT (SELECT COUNT(*)::int FROM board) AS total, b.rank, b.score
+FROM (SELECT 1) one
+LEFT JOIN board b ON b."userId" = ${user_param}::text
+'''
+
+# Position statements take the board's parameters followed by the user id
+XP_PERIOD_POSITION_SQL = position_statement(XP_PERIOD_LEADERBOARD_SQL, 6)
+BADGE_POSITION_SQL = position_statement(BADGE_LEADERBOARD_SQL, 6)
+QUEST_POSITION_SQL = position_statement(QUEST_LEADERBOARD_SQL, 6)
+XP_ALL_TIME_POSITION_SQL = position_statement(XP_ALL_TIME_LEADERBOARD_SQL, 5)
+STREAK_POSITION_SQL = position_statement(STREAK_LEADERBOARD_SQL, 5)
+
 class LeaderboardService:
     """Service for managing and calculating leaderboards"""
     
@@ -28,230 +172,209 @@ class LeaderboardService:
     def get_period_start(period: LeaderboardPeriod) -> datetime:
         """Get the start date for a leaderboard period"""
         now = datetime.utcnow()
+        cache_key = (period, now.date())
+        cached = _period_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         if period == LeaderboardPeriod.DAILY:
-            return now.replace(hour=0, minute=0, second=0, microsecond=0)
+            period_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
         elif period == LeaderboardPeriod.WEEKLY:
             # Start of current week (Monday)
             days_since_monday = now.weekday()
-            return (now - timedelta(days=days_since_monday)).replace(hour=0, minute=0, second=0, microsecond=0)
+            period_start = (now - timedelta(days=days_since_monday)).replace(hour=0, minute=0, second=0, microsecond=0)
         elif period == LeaderboardPeriod.MONTHLY:
             # Start of current month
-            return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            period_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         else:  # ALL_TIME
-            return datetime.min
+            period_start = datetime.min
+        
+        # Drop entries from previous days before they pile up
+        if len(_period_cache) >= 8:
+            _period_cache.clear()
+        _period_cache[cache_key] = period_start
+        return period_start
     
     @staticmethod
-    async def calculate_xp_leaderboard(
-        db, scope: LeaderboardScope, period: LeaderboardPeriod,
-        city_id: Optional[str] = None, user_friends: Optional[List[str]] = None
-    ) -> List[Dict[str, Any]]:
-        """Calculate XP-based leaderboard"""
-        
-        period_start = LeaderboardService.get_period_start(period)
-        
-        # Base query filters
-        where_filters = {}
+    def statement_params(
+        scope: LeaderboardScope, period: LeaderboardPeriod,
+        city_id: Optional[str], user_friends: Optional[List[str]],
+        limit: Optional[int], offset: int
+    ) -> tuple:
+        """Bind values for the leaderboard statements; unused filters (and a None limit) are passed as NULL"""
+        period_start = None
         if period != LeaderboardPeriod.ALL_TIME:
-            where_filters["lastActiveAt"] = {"gte": period_start}
+            period_start = LeaderboardService.get_period_start(period)
         
-        if scope == LeaderboardScope.FRIENDS and user_friends:
-            where_filters["id"] = {"in": user_friends}
-        
-        # For city scope, we need users who have activity in that city
-        if scope == LeaderboardScope.CITY and city_id:
-            where_filters["questProgresses"] = {
-                "some": {
-                    "status": "completed",
-                    "quest": {"cityId": city_id}
-                }
-            }
-            
-            if period != LeaderboardPeriod.ALL_TIME:
-                where_filters["questProgresses"]["some"]["completedAt"] = {"gte": period_start}
+        friends = user_friends if scope == LeaderboardScope.FRIENDS and user_friends else None
+        city = city_id if scope == LeaderboardScope.CITY and city_id else None
+        return (period_start, friends, city, limit, offset)
+    
+    @staticmethod
+    def user_column_params(
+        scope: LeaderboardScope, city_id: Optional[str],
+        user_friends: Optional[List[str]], limit: Optional[int], offset: int
+    ) -> tuple:
+        """Bind values for the statements ranking a users column directly"""
+        friends = user_friends if scope == LeaderboardScope.FRIENDS and user_friends else None
+        city = city_id if scope == LeaderboardScope.CITY and city_id else None
+        return (friends, city, limit, offset)
+    
+    @staticmethod
+    async def load_users(db, user_ids: List[str]) -> Dict[str, Any]:
+        """Fetch the users behind a page of leaderboard rows in one query"""
+        if not user_ids:
+            return {}
         
-        # Get users with their XP
         users = await db.user.find_many(
-            where=where_filters,
-            order={"totalXP": "desc"},
-            take=100,  # Top 100
-            include={"questProgresses": {"include": {"quest": True}}}
+            where={"id": {"in": user_ids}},
+            select=LEADERBOARD_USER_FIELDS
         )
+        return {user.id: user for user in users}
+    
+    @staticmethod
+    async def build_ranked_entries(db, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Attach user records to ranked (userId, score, rank) rows, preserving order"""
+        users = await LeaderboardService.load_users(db, [row["userId"] for row in rows])
         
-        # Calculate period-specific XP if needed
         leaderboard = []
-        for user in users:
-            if period == LeaderboardPeriod.ALL_TIME:
-                score = user.totalXP
-            else:
-                # Calculate XP earned in the period
-                period_xp = 0
-                for qp in user.questProgresses:
-                    if (qp.status == "completed" and qp.completedAt and 
-                        qp.completedAt >= period_start):
-                        if scope == LeaderboardScope.CITY and city_id:
-                            if qp.quest.cityId == city_id:
-                                period_xp += qp.quest.xpReward
-                        else:
-                            period_xp += qp.quest.xpReward
-                score = period_xp
-            
-            if score > 0:  # Only include users with points in this period
+        for row in rows:
+            user = users.get(row["userId"])
+            if user:
                 leaderboard.append({
                     "user": user,
-                    "score": score
+                    "score": row["score"],
+                    "rank": row["rank"]
                 })
         
-        # Sort by score and assign ranks
-        leaderboard.sort(key=lambda x: x["score"], reverse=True)
-        
-        for i, entry in enumerate(leaderboard):
-            entry["rank"] = i + 1
-        
         return leaderboard
     
     @staticmethod
-    async def calculate_badge_leaderboard(
+    async def calculate_xp_leaderboard(
         db, scope: LeaderboardScope, period: LeaderboardPeriod,
-        city_id: Optional[str] = None, user_friends: Optional[List[str]] = None
+        city_id: Optional[str] = None, user_friends: Optional[List[str]] = None,
+        limit: int = 100, offset: int = 0
     ) -> List[Dict[str, Any]]:
-        """Calculate badge-based leaderboard"""
-        
-        period_start = LeaderboardService.get_period_start(period)
-        
-        # Build where clause for badges
-        badge_where = {}
-        if period != LeaderboardPeriod.ALL_TIME:
-            badge_where["mintedAt"] = {"gte": period_start}
-        
-        if scope == LeaderboardScope.FRIENDS and user_friends:
-            badge_where["userId"] = {"in": user_friends}
+        """Calculate XP-based leaderboard"""
         
-        if scope == LeaderboardScope.CITY and city_id:
-            badge_where["badge"] = {
-                "questRewards": {
-                    "some": {"cityId": city_id}
-                }
-            }
+        if period == LeaderboardPeriod.ALL_TIME:
+            # Lifetime XP is a plain column, so the DB can order and page it directly
+            rows = await db.query_raw(
+                XP_ALL_TIME_LEADERBOARD_SQL,
+                *LeaderboardService.user_column_params(
+                    scope, city_id, user_friends, limit, offset
+                )
+            )
+            
+            return await LeaderboardService.build_ranked_entries(db, rows)
         
-        # Get badge counts per user
-        users_with_badges = await db.userbadge.group_by(
-            by=["userId"],
-            where=badge_where,
-            _count={"userId": True}
+        # XP earned in the period is summed, ranked and paged in SQL
+        rows = await db.query_raw(
+            XP_PERIOD_LEADERBOARD_SQL,
+            *LeaderboardService.statement_params(
+                scope, period, city_id, user_friends, limit, offset
+            )
         )
         
-        # Get user details
-        leaderboard = []
-        for entry in users_with_badges:
-            user = await db.user.find_unique(where={"id": entry.userId})
-            if user:
-                leaderboard.append({
-                    "user": user,
-                    "score": entry._count.userId,
-                    "rank": 0  # Will be set below
-                })
+        return await LeaderboardService.build_ranked_entries(db, rows)
+    
+    @staticmethod
+    async def calculate_badge_leaderboard(
+        db, scope: LeaderboardScope, period: LeaderboardPeriod,
+        city_id: Optional[str] = None, user_friends: Optional[List[str]] = None,
+        limit: int = 100, offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Calculate badge-based leaderboard"""
         
-        # Sort and assign ranks
-        leaderboard.sort(key=lambda x: x["score"], reverse=True)
-        for i, entry in enumerate(leaderboard):
-            entry["rank"] = i + 1
+        # Count, rank and page badge holders in one query
+        rows = await db.query_raw(
+            BADGE_LEADERBOARD_SQL,
+            *LeaderboardService.statement_params(
+                scope, period, city_id, user_friends, limit, offset
+            )
+        )
         
-        return leaderboard
+        return await LeaderboardService.build_ranked_entries(db, rows)
     
     @staticmethod
     async def calculate_quest_leaderboard(
         db, scope: LeaderboardScope, period: LeaderboardPeriod,
-        city_id: Optional[str] = None, user_friends: Optional[List[str]] = None
+        city_id: Optional[str] = None, user_friends: Optional[List[str]] = None,
+        limit: int = 100, offset: int = 0
     ) -> List[Dict[str, Any]]:
         """Calculate quest completion leaderboard"""
         
-        period_start = LeaderboardService.get_period_start(period)
-        
-        # Build where clause
-        quest_where = {"status": "completed"}
-        if period != LeaderboardPeriod.ALL_TIME:
-            quest_where["completedAt"] = {"gte": period_start}
-        
-        if scope == LeaderboardScope.FRIENDS and user_friends:
-            quest_where["userId"] = {"in": user_friends}
-        
-        if scope == LeaderboardScope.CITY and city_id:
-            quest_where["quest"] = {"cityId": city_id}
-        
-        # Get quest completion counts
-        users_with_quests = await db.questprogress.group_by(
-            by=["userId"],
-            where=quest_where,
-            _count={"userId": True}
+        # Count, rank and page quest completions in one query
+        rows = await db.query_raw(
+            QUEST_LEADERBOARD_SQL,
+            *LeaderboardService.statement_params(
+                scope, period, city_id, user_friends, limit, offset
+            )
         )
         
-        # Get user details
-        leaderboard = []
-        for entry in users_with_quests:
-            user = await db.user.find_unique(where={"id": entry.userId})
-            if user:
-                leaderboard.append({
-                    "user": user,
-                    "score": entry._count.userId,
-                    "rank": 0
-                })
-        
-        # Sort and assign ranks
-        leaderboard.sort(key=lambda x: x["score"], reverse=True)
-        for i, entry in enumerate(leaderboard):
-            entry["rank"] = i + 1
-        
-        return leaderboard
+        return await LeaderboardService.build_ranked_entries(db, rows)
     
     @staticmethod
     async def calculate_streak_leaderboard(
         db, scope: LeaderboardScope, period: LeaderboardPeriod,
-        city_id: Optional[str] = None, user_friends: Optional[List[str]] = None
+        city_id: Optional[str] = None, user_friends: Optional[List[str]] = None,
+        limit: int = 100, offset: int = 0
     ) -> List[Dict[str, Any]]:
         """Calculate streak-based leaderboard"""
         
-        # Build where clause
-        where_filters = {}
-        if scope == LeaderboardScope.FRIENDS and user_friends:
-            where_filters["id"] = {"in": user_friends}
-        
-        # For city scope, only users active in that city
-        if scope == LeaderboardScope.CITY and city_id:
-            where_filters["questProgresses"] = {
-                "some": {
-                    "status": "completed",
-                    "quest": {"cityId": city_id}
-                }
-            }
-        
-        # Get users ordered by streak
-        users = await db.user.find_many(
-            where=where_filters,
-            order={"streakDays": "desc"},
-            take=100
+        # Only users with active streaks, ordered and paged in SQL
+        rows = await db.query_raw(
+            STREAK_LEADERBOARD_SQL,
+            *LeaderboardService.user_column_params(
+                scope, city_id, user_friends, limit, offset
+            )
         )
         
-        leaderboard = []
-        for i, user in enumerate(users):
-            if user.streakDays > 0:  # Only include users with active streaks
-                leaderboard.append({
-                    "user": user,
-                    "score": user.streakDays,
-                    "rank": i + 1
-                })
+        return await LeaderboardService.build_ranked_entries(db, rows)
+
+    @staticmethod
+    async def user_position(
+        db, leaderboard_type: LeaderboardType, scope: LeaderboardScope,
+        period: LeaderboardPeriod, user_id: str,
+        city_id: Optional[str] = None, user_friends: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        A user's rank and score (None when unranked) and the board's total
+        participants, computed over the whole board rather than a page of it
+        """
+        if leaderboard_type == LeaderboardType.XP and period == LeaderboardPeriod.ALL_TIME:
+            sql, params = XP_ALL_TIME_POSITION_SQL, LeaderboardService.user_column_params(
+                scope, city_id, user_friends, None, 0
+            )
+        elif leaderboard_type == LeaderboardType.STREAKS:
+            sql, params = STREAK_POSITION_SQL, LeaderboardService.user_column_params(
+                scope, city_id, user_friends, None, 0
+            )
+        else:
+            sql = {
+                LeaderboardType.XP: XP_PERIOD_POSITION_SQL,
+                LeaderboardType.BADGES: BADGE_POSITION_SQL,
+                LeaderboardType.QUESTS_COMPLETED: QUEST_POSITION_SQL
+            }.get(leaderboard_type)
+            if sql is None:
+                return {"rank": None, "score": None, "total": 0}
+            params = LeaderboardService.statement_params(
+                scope, period, city_id, user_friends, None, 0
+            )
         
-        return leaderboard
+        rows = await db.query_raw(sql, *params, user_id)
+        return rows[0] if rows else {"rank": None, "score": None, "total": 0}
 
 leaderboard_service = LeaderboardService()
 
-@router.get("/", response_model=List[Dict[str, Any]])
+@router.get("/", response_class=ORJSONResponse)
 async def get_leaderboards(
     leaderboard_type: LeaderboardType = Query(LeaderboardType.XP),
     scope: LeaderboardScope = Query(LeaderboardScope.GLOBAL),
     period: LeaderboardPeriod = Query(LeaderboardPeriod.ALL_TIME),
     city_id: Optional[str] = Query(None),
     limit: int = Query(50, le=100),
+    offset: int = Query(0, ge=0),
     current_user = Depends(get_current_user),
     db = Depends(get_db)
 ):
@@ -262,34 +385,32 @@ async def get_leaderboards(
     if scope == LeaderboardScope.FRIENDS:
         user_with_friends = await db.user.find_unique(
             where={"id": current_user.id},
-            include={"friends": True}
+            select={"friends": {"select": {"id": True}}}
         )
         user_friends = [friend.id for friend in user_with_friends.friends] + [current_user.id]
     
     # Calculate leaderboard based on type
     if leaderboard_type == LeaderboardType.XP:
         leaderboard_data = await leaderboard_service.calculate_xp_leaderboard(
-            db, scope, period, city_id, user_friends
+            db, scope, period, city_id, user_friends, limit, offset
         )
     elif leaderboard_type == LeaderboardType.BADGES:
         leaderboard_data = await leaderboard_service.calculate_badge_leaderboard(
-            db, scope, period, city_id, user_friends
+            db, scope, period, city_id, user_friends, limit, offset
         )
     elif leaderboard_type == LeaderboardType.QUESTS_COMPLETED:
         leaderboard_data = await leaderboard_service.calculate_quest_leaderboard(
-            db, scope, period, city_id, user_friends
+            db, scope, period, city_id, user_friends, limit, offset
         )
     elif leaderboard_type == LeaderboardType.STREAKS:
         leaderboard_data = await leaderboard_service.calculate_streak_leaderboard(
-            db, scope, period, city_id, user_friends
+            db, scope, period, city_id, user_friends, limit, offset
         )
     else:
         leaderboard_data = []
     
-    # Limit results
-    leaderboard_data = leaderboard_data[:limit]
-    
     # Format response with privacy considerations
+    friend_ids = set(user_friends)
     entries = []
     for entry in leaderboard_data:
         user = entry["user"]
@@ -298,7 +419,7 @@ async def get_leaderboards(
         show_full_info = (
             user.id == current_user.id or  # Own data
             scope == LeaderboardScope.FRIENDS or  # Friends leaderboard
-            user.id in user_friends  # Is a friend
+            user.id in friend_ids  # Is a friend
         )
         
         if show_full_info:
@@ -317,34 +438,36 @@ async def get_leaderboards(
             if hide_info and scope == LeaderboardScope.GLOBAL:
                 continue  # Skip this user entirely
             
+            hashed_id = leaderboard_service.hash_user_id(user.id)
             user_info = {
-                "id": leaderboard_service.hash_user_id(user.id),
-                "username": f"Anonymous {leaderboard_service.hash_user_id(user.id)[:6]}",
-                "email": f"user{leaderboard_service.hash_user_id(user.id)[:6]}@hidden.com",
+                "id": hashed_id,
+                "username": f"Anonymous {hashed_id[:6]}",
+                "email": f"user{hashed_id[:6]}@hidden.com",
                 "profile_image_url": None,
                 "level": user.level
             }
         
-        entries.append({
-            "rank": entry["rank"],
-            "user": user_info,
-            "score": entry["score"],
-            "is_current_user": user.id == current_user.id
-        })
+        entries.append(LeaderboardRow(
+            rank=entry["rank"],
+            user=user_info,
+            score=entry["score"],
+            is_current_user=user.id == current_user.id
+        ))
     
     # Get user's position in leaderboard if not visible
     current_user_position = None
-    if not any(entry["is_current_user"] for entry in entries):
-        # Find current user's position in the full leaderboard
-        for i, entry in enumerate(leaderboard_data):
-            if entry["user"].id == current_user.id:
-                current_user_position = {
-                    "rank": entry["rank"],
-                    "score": entry["score"]
-                }
-                break
-    
-    return {
+    if not any(entry.is_current_user for entry in entries):
+        # Find current user's position in the full leaderboard, not just this page
+        position = await leaderboard_service.user_position(
+            db, leaderboard_type, scope, period, current_user.id, city_id, user_friends
+        )
+        if position["rank"] is not None:
+            current_user_position = {
+                "rank": position["rank"],
+                "score": position["score"]
+            }
+    
+    return ORJSONResponse({
         "leaderboard_type": leaderboard_type,
         "scope": scope,
         "period": period,
@@ -352,8 +475,8 @@ async def get_leaderboards(
         "total_entries": len(entries),
         "entries": entries,
         "current_user_position": current_user_position,
-        "last_updated": datetime.utcnow().isoformat()
-    }
+        "last_updated": datetime.utcnow()
+    })
 
 @router.get("/user/{user_id}/position")
 async def get_user_leaderboard_position(
@@ -369,7 +492,10 @@ async def get_user_leaderboard_position(
     
     # Check if requesting user has permission to view this data
     if user_id != current_user.id:
-        target_user = await db.user.find_unique(where={"id": user_id})
+        target_user = await db.user.find_unique(
+            where={"id": user_id},
+            select={"id": True, "privacySettings": True}
+        )
         if not target_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -381,7 +507,8 @@ async def get_user_leaderboard_position(
             where={
                 "id": current_user.id,
                 "friends": {"some": {"id": user_id}}
-            }
+            },
+            select={"id": True}
         )
         
         if not friendship:
@@ -397,52 +524,32 @@ async def get_user_leaderboard_position(
     if scope == LeaderboardScope.FRIENDS:
         user_with_friends = await db.user.find_unique(
             where={"id": user_id},
-            include={"friends": True}
+            select={"friends": {"select": {"id": True}}}
         )
         user_friends = [friend.id for friend in user_with_friends.friends] + [user_id]
     
-    # Calculate full leaderboard
-    if leaderboard_type == LeaderboardType.XP:
-        leaderboard_data = await leaderboard_service.calculate_xp_leaderboard(
-            db, scope, period, city_id, user_friends
-        )
-    elif leaderboard_type == LeaderboardType.BADGES:
-        leaderboard_data = await leaderboard_service.calculate_badge_leaderboard(
-            db, scope, period, city_id, user_friends
-        )
-    elif leaderboard_type == LeaderboardType.QUESTS_COMPLETED:
-        leaderboard_data = await leaderboard_service.calculate_quest_leaderboard(
-            db, scope, period, city_id, user_friends
-        )
-    elif leaderboard_type == LeaderboardType.STREAKS:
-        leaderboard_data = await leaderboard_service.calculate_streak_leaderboard(
-            db, scope, period, city_id, user_friends
-        )
-    else:
-        leaderboard_data = []
-    
-    # Find user's position
-    user_position = None
-    for entry in leaderboard_data:
-        if entry["user"].id == user_id:
-            user_position = {
-                "rank": entry["rank"],
-                "score": entry["score"],
-                "total_participants": len(leaderboard_data)
-            }
-            break
+    # Rank the user against the whole board in the database
+    position = await leaderboard_service.user_position(
+        db, leaderboard_type, scope, period, user_id, city_id, user_friends
+    )
     
-    if not user_position:
+    if position["rank"] is not None:
+        user_position = {
+            "rank": position["rank"],
+            "score": position["score"],
+            "total_participants": position["total"]
+        }
+    else:
         user_position = {
             "rank": None,
             "score": 0,
-            "total_participants": len(leaderboard_data),
+            "total_participants": position["total"],
             "message": "User not ranked in this leaderboard"
         }
     
     return user_position
 
-@router.get("/summary")
+@router.get("/summary", response_class=ORJSONResponse)
 async def get_leaderboard_summary(
     current_user = Depends(get_current_user),
     db = Depends(get_db)
@@ -451,72 +558,40 @@ async def get_leaderboard_summary(
     
     user_id = current_user.id
     
-    # Calculate positions across different leaderboards
-    positions = {}
-    
-    # Global XP leaderboard
-    xp_leaderboard = await leaderboard_service.calculate_xp_leaderboard(
-        db, LeaderboardScope.GLOBAL, LeaderboardPeriod.ALL_TIME
-    )
-    
-    for entry in xp_leaderboard:
-        if entry["user"].id == user_id:
-            positions["global_xp"] = {
-                "rank": entry["rank"],
-                "score": entry["score"],
-                "total": len(xp_leaderboard)
-            }
-            break
-    
-    # Global badge leaderboard
-    badge_leaderboard = await leaderboard_service.calculate_badge_leaderboard(
-        db, LeaderboardScope.GLOBAL, LeaderboardPeriod.ALL_TIME
-    )
-    
-    for entry in badge_leaderboard:
-        if entry["user"].id == user_id:
-            positions["global_badges"] = {
-                "rank": entry["rank"],
-                "score": entry["score"],
-                "total": len(badge_leaderboard)
-            }
-            break
-    
-    # Weekly XP leaderboard
-    weekly_xp = await leaderboard_service.calculate_xp_leaderboard(
-        db, LeaderboardScope.GLOBAL, LeaderboardPeriod.WEEKLY
-    )
-    
-    for entry in weekly_xp:
-        if entry["user"].id == user_id:
-            positions["weekly_xp"] = {
-                "rank": entry["rank"],
-                "score": entry["score"],
-                "total": len(weekly_xp)
-            }
-            break
-    
-    # Streak leaderboard
-    streak_leaderboard = await leaderboard_service.calculate_streak_leaderboard(
-        db, LeaderboardScope.GLOBAL, LeaderboardPeriod.ALL_TIME
-    )
+    # Calculate positions across different leaderboards: global XP, global badges,
+    # weekly XP and streaks, each ranked over the whole board in the database
+    boards = {
+        "global_xp": (LeaderboardType.XP, LeaderboardPeriod.ALL_TIME),
+        "global_badges": (LeaderboardType.BADGES, LeaderboardPeriod.ALL_TIME),
+        "weekly_xp": (LeaderboardType.XP, LeaderboardPeriod.WEEKLY),
+        "global_streaks": (LeaderboardType.STREAKS, LeaderboardPeriod.ALL_TIME)
+    }
+    results = await asyncio.gather(*(
+        leaderboard_service.user_position(
+            db, leaderboard_type, LeaderboardScope.GLOBAL, period, user_id
+        )
+        for leaderboard_type, period in boards.values()
+    ))
     
-    for entry in streak_leaderboard:
-        if entry["user"].id == user_id:
-            positions["global_streaks"] = {
-                "rank": entry["rank"],
-                "score": entry["score"],
-                "total": len(streak_leaderboard)
+    positions = {}
+    for name, position in zip(boards, results):
+        if position["rank"] is not None:
+            positions[name] = {
+                "rank": position["rank"],
+                "score": position["score"],
+                "total": position["total"]
             }
-            break
     
-    # Calculate percentiles
-    for key, position in positions.items():
-        if position.get("rank") and position.get("total"):
-            percentile = 100 - ((position["rank"] - 1) / position["total"] * 100)
-            position["percentile"] = round(percentile, 1)
+    # Calculate percentiles for every ranked board in one vectorized pass
+    ranked = [position for position in positions.values() if position.get("rank") and position.get("total")]
+    if ranked:
+        ranks = np.fromiter((position["rank"] for position in ranked), dtype=np.float64, count=len(ranked))
+        totals = np.fromiter((position["total"] for position in ranked), dtype=np.float64, count=len(ranked))
+        percentiles = np.round(100 - (ranks - 1) / totals * 100, 1)
+        for position, percentile in zip(ranked, percentiles.tolist()):
+            position["percentile"] = percentile
     
-    return {
+    return ORJSONResponse({
         "user_id": user_id,
         "positions": positions,
         "achievements": {
@@ -525,8 +600,8 @@ async def get_leaderboard_summary(
             "top_1_percent": any(pos.get("percentile", 0) >= 99 for pos in positions.values()),
             "top_10_percent": any(pos.get("percentile", 0) >= 90 for pos in positions.values())
         },
-        "generated_at": datetime.utcnow().isoformat()
-    }
+        "generated_at": datetime.utcnow()
+    })
 
 @router.post("/privacy", response_model=MessageResponse)
 async def update_leaderboard_privacy(
@@ -536,9 +611,6 @@ async def update_leaderboard_privacy(
 ):
     """Update user's leaderboard privacy settings"""
     
-    # Get current preferences
-    current_preferences = current_user.privacySettings or {}
-    
     # Update leaderboard privacy settings
     leaderboard_privacy = {
         "hide_from_public_leaderboards": privacy_settings.get("hide_from_public", False),
@@ -547,22 +619,35 @@ async def update_leaderboard_privacy(
         "anonymous_in_global": privacy_settings.get("anonymous_global", False)
     }
     
-    current_preferences.update(leaderboard_privacy)
-    
-    # Update user privacy settings
-    await db.user.update(
-        where={"id": current_user.id},
-        data={"privacySettings": current_preferences}
+    # Merge into the stored settings atomically instead of read-modify-write
+    await db.execute_raw(
+        '''
+        UPDATE "users"
+        SET "privacySettings" = COALESCE("privacySettings", '{}'::jsonb) || $1::jsonb
+        WHERE "id" = $2
+        ''',
+        json.dumps(leaderboard_privacy),
+        current_user.id
     )
     
     return MessageResponse(message="Leaderboard privacy settings updated successfully")
 
-@router.get("/competitions")
+@router.get("/competitions", response_class=ORJSONResponse)
 async def get_active_competitions(
     db = Depends(get_db)
 ):
     """Get active leaderboard competitions and challenges"""
     
+    global _competitions_cache
+    
+    now = time.monotonic()
+    if _competitions_cache and _competitions_cache[0] > now:
+        return Response(content=_competitions_cache[1], media_type="application/json")
+    
+    # Both competitions share the same day/month boundaries
+    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    month_start = today_start.replace(day=1)
+    
     # Mock competitions for demonstration
     # In a real system, these would be stored in the database
     competitions = [
@@ -573,8 +658,8 @@ async def get_active_competitions(
             "type": "QUESTS_COMPLETED",
             "period": "WEEKLY",
             "prize": "500 tokens + Exclusive Badge",
-            "starts_at": datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0),
-            "ends_at": datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=7),
+            "starts_at": today_start,
+            "ends_at": today_start + timedelta(days=7),
             "participants": 156,
             "is_active": True
         },
@@ -585,14 +670,17 @@ async def get_active_competitions(
             "type": "BADGES",
             "period": "MONTHLY",
             "prize": "1000 tokens + Legendary Badge",
-            "starts_at": datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0),
-            "ends_at": (datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0) + timedelta(days=32)).replace(day=1) - timedelta(seconds=1),
+            "starts_at": month_start,
+            "ends_at": (month_start + timedelta(days=32)).replace(day=1) - timedelta(seconds=1),
             "participants": 89,
             "is_active": True
         }
     ]
     
-    return {
+    body = orjson.dumps({
         "active_competitions": competitions,
         "total_active": len(competitions)
-    }
\ No newline at end of file
+    })
+    _competitions_cache = (now + COMPETITIONS_CACHE_TTL_SECONDS, body)
+    
+    return Response(content=body, media_type="application/json")
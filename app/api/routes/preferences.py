@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel, Field
 from datetime import datetime
+import json
 
 from app.core.database import get_db
 from app.api.routes.auth import get_current_user
@@ -27,6 +28,9 @@ class UserPreferencesModel(BaseModel):
     language_comfort: List[str] = Field(default=[], description="List of languages user is comfortable with")
     interests: List[str] = Field(default=[], description="List of specific interests")
 
+# Keys accepted by partial preference updates
+ALLOWED_PREFERENCE_FIELDS = frozenset(UserPreferencesModel.model_fields) | {"setup_completed"}
+
 class PreferencesResponse(BaseModel):
     """Response model for user preferences"""
     user_id: str
@@ -115,29 +119,34 @@ async def update_specific_preferences(
     """
     Update specific preference fields without replacing all preferences
     """
-    try:
-        # Get current preferences
-        user = await db.user.find_unique(
-            where={"id": current_user.id},
-            select={"preferences": True}
+    unknown_fields = set(preference_updates) - ALLOWED_PREFERENCE_FIELDS
+    if unknown_fields:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown preference fields: {', '.join(sorted(unknown_fields))}"
         )
+    
+    try:
+        updates = {**preference_updates, "last_updated": str(datetime.utcnow())}
         
-        current_preferences = user.preferences if user and user.preferences else {}
-        
-        # Merge with updates
-        updated_preferences = {**current_preferences, **preference_updates}
-        updated_preferences["last_updated"] = str(datetime.utcnow())
-        
-        # Update in database
-        updated_user = await db.user.update(
-            where={"id": current_user.id},
-            data={"preferences": updated_preferences}
+        # Merge server-side so partial edits need no read and can't lose concurrent updates
+        rows = await db.query_raw(
+            '''
+            UPDATE "users"
+            SET "preferences" = COALESCE("preferences", '{}'::jsonb) || $1::jsonb
+            WHERE "id" = $2
+            RETURNING "preferences"
+            ''',
+            json.dumps(updates),
+            current_user.id
         )
         
+        updated_preferences = rows[0]["preferences"] if rows else updates
+        
         return PreferencesResponse(
-            user_id=updated_user.id,
+            user_id=current_user.id,
             preferences=updated_preferences,
-            updated_at=updated_preferences["last_updated"],
+            updated_at=updates["last_updated"],
             message="Preferences updated successfully"
         )
         
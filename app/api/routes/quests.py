@@ -1,10 +1,17 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Query
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
-from geopy.distance import geodesic
+from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass
 import math
+import time
+import numpy as np
+from numba import njit
+from prisma.errors import ForeignKeyViolationError, UniqueViolationError
 
 from app.core.database import get_db
+from app.core import user_stats_cache
+from app.core.geo import bounding_box_filter, cell_id, covering_cell_ranges, haversine_m, point_distances
 from app.api.routes.auth import get_current_user
 from app.models.schemas import (
     QuestCreate,
@@ -16,24 +23,171 @@ from app.models.schemas import (
     MessageResponse
 )
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Quest geometry used by verify-location, as quest_id -> (expires_at, QuestGeometry)
+QUEST_GEOMETRY_CACHE_TTL_SECONDS = 300
+QUEST_GEOMETRY_CACHE_MAX_ENTRIES = 4096
+_quest_geometry_cache: Dict[str, tuple] = {}
+
+# QuestResponse field -> Quest column; list queries select only these columns,
+# full details belong to /{quest_id}
+QUEST_RESPONSE_COLUMNS = {
+    "id": "id",
+    "title": "title",
+    "description": "description",
+    "type": "type",
+    "difficulty": "difficulty",
+    "city_id": "cityId",
+    "latitude": "latitude",
+    "longitude": "longitude",
+    "radius": "radius",
+    "xp_reward": "xpReward",
+    "token_reward": "tokenReward",
+    "required_level": "requiredLevel",
+    "current_completions": "currentCompletions",
+    "max_completions": "maxCompletions",
+    "is_active": "isActive",
+    "created_at": "createdAt"
+}
+QUEST_RESPONSE_FIELDS = {column: True for column in QUEST_RESPONSE_COLUMNS.values()}
+
+# Quest list without a location filter, as one fixed statement so the query engine
+# and Postgres reuse a single plan ($1 city id, $2 type, $3 difficulty, $4 max
+# required level, $5 availability time, $6 limit, $7 offset; unused filters are NULL).
+# Columns are aliased to QuestResponse fields, so rows are returned as-is.
+QUEST_LIST_SQL = f'''
+SELECT {", ".join(f'"{column}" AS "{field}"' for field, column in QUEST_RESPONSE_COLUMNS.items())}
+FROM "quests"
+WHERE "isActive" = true
+  AND ($1::text IS NULL OR "cityId" = $1::text)
+  AND ($2::text IS NULL OR "type"::text = $2::text)
+  AND ($3::text IS NULL OR "difficulty"::text = $3::text)
+  AND "requiredLevel" <= $4::int
+  AND ($5::timestamp IS NULL OR (
+      ("availableFrom" IS NULL OR "availableFrom" <= $5::timestamp)
+      AND ("availableTo" IS NULL OR "availableTo" >= $5::timestamp)
+  ))
+ORDER BY "createdAt" DESC
+LIMIT $6 OFFSET $7
+'''
+
+# Nearby quests: the covering cell ranges ($1 lows, $2 highs) are range scans on the
+# quests cellId index, then the exact radius, ordering and top-k run in Postgres ($3 max required level, $4/$5 user
+# latitude/longitude, $6 radius in meters, $7 limit)
+NEARBY_QUESTS_SQL = f'''
+SELECT {", ".join(f'q."{column}" AS "{field}"' for field, column in QUEST_RESPONSE_COLUMNS.items())}
+FROM unnest($1::bigint[], $2::bigint[]) AS cell(low, high)
+JOIN "quests" q ON q."cellId" >= cell.low AND q."cellId" < cell.high
+CROSS JOIN LATERAL (
+    SELECT 2 * 6371000 * asin(sqrt(LEAST(1,
+        power(sin(radians(q."latitude" - $4::float8) / 2), 2) +
+        cos(radians($4::float8)) * cos(radians(q."latitude")) *
+        power(sin(radians(q."longitude" - $5::float8) / 2), 2)
+    ))) AS meters
+) d
+WHERE q."isActive" = true
+  AND q."requiredLevel" <= $3::int
+  AND d.meters <= $6::float8
+ORDER BY d.meters, q."id"
+LIMIT $7
+'''
+
+try:
+    # Ahead-of-time build from scripts/build_geo_kernels.py: no JIT in any worker
+    from app.core._geo_kernels import haversine_m as _haversine_m
+except ImportError:
+    _haversine_m = njit(cache=True, fastmath=True, nogil=True)(haversine_m)
+    # Compile (or load from the on-disk cache) at import so requests never pay for it
+    _haversine_m(0.0, 0.0, 0.0, 0.0)
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Calculate distance between two points in meters using Haversine formula"""
+    return _haversine_m(float(lat1), float(lon1), float(lat2), float(lon2))
+
+def tangent_plane_distance_sq(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Squared distance in square meters on the local tangent plane (equirectangular).
+    Matches Haversine to well under a meter at geo-fence scales, without asin/sqrt.
+    """
     R = 6371000  # Earth's radius in meters
     
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
+    mean_lat = math.radians((lat1 + lat2) / 2)
+    dx = math.radians(lon2 - lon1) * math.cos(mean_lat) * R
+    dy = math.radians(lat2 - lat1) * R
+    return dx * dx + dy * dy
+
+@dataclass(slots=True)
+class QuestGeometry:
+    """Static location data of a quest and its points (points stored as parallel arrays)"""
+    latitude: float
+    longitude: float
+    radius: float
+    xp_reward: int
+    token_reward: int
+    point_rows: Dict[str, int]
+    point_lats: np.ndarray
+    point_lons: np.ndarray
+    point_radii: np.ndarray
+    required_mask: int  # bit i set when point row i is required
+
+async def get_quest_geometry(db, quest_id: str) -> Optional[QuestGeometry]:
+    """Quest geometry for verify-location, cached per quest for a few minutes"""
+    now = time.monotonic()
+    cached = _quest_geometry_cache.get(quest_id)
+    if cached is not None and cached[0] > now:
+        return cached[1]
     
-    a = math.sin(delta_lat/2) * math.sin(delta_lat/2) + \
-        math.cos(lat1_rad) * math.cos(lat2_rad) * \
-        math.sin(delta_lon/2) * math.sin(delta_lon/2)
+    quest = await db.quest.find_unique(
+        where={"id": quest_id},
+        include={"questPoints": True}
+    )
+    if not quest:
+        return None
     
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    points = quest.questPoints or []
+    geometry = QuestGeometry(
+        latitude=quest.latitude,
+        longitude=quest.longitude,
+        radius=quest.radius,
+        xp_reward=quest.xpReward,
+        token_reward=quest.tokenReward,
+        point_rows={point.id: i for i, point in enumerate(points)},
+        point_lats=np.array([point.latitude for point in points], dtype=np.float64),
+        point_lons=np.array([point.longitude for point in points], dtype=np.float64),
+        point_radii=np.array([point.radius for point in points], dtype=np.float64),
+        required_mask=sum(1 << i for i, point in enumerate(points) if not point.isOptional)
+    )
     
-    return R * c
+    # Drop everything rather than track recency once the cache fills up
+    if len(_quest_geometry_cache) >= QUEST_GEOMETRY_CACHE_MAX_ENTRIES:
+        _quest_geometry_cache.clear()
+    _quest_geometry_cache[quest_id] = (now + QUEST_GEOMETRY_CACHE_TTL_SECONDS, geometry)
+    return geometry
+
+def _compile_quest_projector():
+    """
+    Generate the quest -> QuestResponse dict projection once at import, with every
+    attribute read written out inline instead of looping over the column map per row
+    """
+    items = "".join(
+        f"        {field!r}: quest.{column},\n"
+        for field, column in QUEST_RESPONSE_COLUMNS.items()
+    )
+    source = f"def project_quest(quest):\n    return {{\n{items}    }}\n"
+    namespace: Dict[str, Any] = {}
+    exec(compile(source, "<quest projector>", "exec"), namespace)
+    return namespace["project_quest"]
+
+# Plain-dict QuestResponse payload for a quest row, ready for orjson
+project_quest = _compile_quest_projector()
+
+def quest_to_response(quest) -> QuestResponse:
+    """Project a quest row onto QuestResponse without re-validating DB-typed fields"""
+    fields = project_quest(quest)
+    fields["type"] = QuestType(fields["type"])
+    fields["difficulty"] = QuestDifficulty(fields["difficulty"])
+    return QuestResponse.model_construct(**fields)
 
 @router.get("/", response_model=List[QuestResponse])
 async def get_quests(
@@ -52,6 +206,24 @@ async def get_quests(
 ):
     """Get quests with filtering options"""
     
+    max_level = user_level if user_level is not None else current_user.level
+    now = datetime.now(timezone.utc) if available_only else None
+    
+    has_location = latitude is not None and longitude is not None and radius_km is not None
+    if not has_location:
+        # Common case: fixed raw statement, rows already shaped like QuestResponse
+        rows = await db.query_raw(
+            QUEST_LIST_SQL,
+            city_id,
+            quest_type.value if quest_type else None,
+            difficulty.value if difficulty else None,
+            max_level,
+            now,
+            limit,
+            offset
+        )
+        return ORJSONResponse(rows)
+    
     # Build where clause
     where_clause = {"isActive": True}
     
@@ -64,13 +236,12 @@ async def get_quests(
     if difficulty:
         where_clause["difficulty"] = difficulty
     
-    if user_level is not None:
-        where_clause["requiredLevel"] = {"lte": user_level}
-    else:
-        where_clause["requiredLevel"] = {"lte": current_user.level}
+    where_clause["requiredLevel"] = {"lte": max_level}
+    
+    # Let the (latitude, longitude) index cut the candidates before the exact check
+    where_clause.update(bounding_box_filter(latitude, longitude, radius_km))
     
     if available_only:
-        now = datetime.utcnow()
         where_clause["OR"] = [
             {"availableFrom": None, "availableTo": None},
             {"availableFrom": {"lte": now}, "availableTo": None},
@@ -80,48 +251,18 @@ async def get_quests(
     
     quests = await db.quest.find_many(
         where=where_clause,
-        include={"city": True, "questPoints": True},
+        select=QUEST_RESPONSE_FIELDS,
         skip=offset,
         take=limit,
         order={"createdAt": "desc"}
     )
     
-    # Filter by distance if user location provided
-    if latitude is not None and longitude is not None and radius_km is not None:
-        user_location = (latitude, longitude)
-        radius_meters = radius_km * 1000
-        
-        filtered_quests = []
-        for quest in quests:
-            quest_location = (quest.latitude, quest.longitude)
-            distance = geodesic(user_location, quest_location).meters
-            
-            if distance <= radius_meters:
-                filtered_quests.append(quest)
-        
-        quests = filtered_quests
-    
-    return [
-        QuestResponse(
-            id=quest.id,
-            title=quest.title,
-            description=quest.description,
-            type=quest.type,
-            difficulty=quest.difficulty,
-            city_id=quest.cityId,
-            latitude=quest.latitude,
-            longitude=quest.longitude,
-            radius=quest.radius,
-            xp_reward=quest.xpReward,
-            token_reward=quest.tokenReward,
-            required_level=quest.requiredLevel,
-            current_completions=quest.currentCompletions,
-            max_completions=quest.maxCompletions,
-            is_active=quest.isActive,
-            created_at=quest.createdAt
-        )
-        for quest in quests
-    ]
+    # Exact distance filter on the bounding-box candidates
+    distances = point_distances(quests, latitude, longitude)
+    quests = [quests[i] for i in np.flatnonzero(distances <= radius_km * 1000)]
+    
+    # Serialize straight to orjson, skipping FastAPI's response re-validation and encoder
+    return ORJSONResponse(list(map(project_quest, quests)))
 
 @router.get("/{quest_id}", response_model=Dict[str, Any])
 async def get_quest_details(
@@ -151,25 +292,8 @@ async def get_quest_details(
     # Get user's progress on this quest
     user_progress = quest.questProgresses[0] if quest.questProgresses else None
     
-    return {
-        "quest": QuestResponse(
-            id=quest.id,
-            title=quest.title,
-            description=quest.description,
-            type=quest.type,
-            difficulty=quest.difficulty,
-            city_id=quest.cityId,
-            latitude=quest.latitude,
-            longitude=quest.longitude,
-            radius=quest.radius,
-            xp_reward=quest.xpReward,
-            token_reward=quest.tokenReward,
-            required_level=quest.requiredLevel,
-            current_completions=quest.currentCompletions,
-            max_completions=quest.maxCompletions,
-            is_active=quest.isActive,
-            created_at=quest.createdAt
-        ),
+    return ORJSONResponse({
+        "quest": project_quest(quest),
         "city": {
             "id": quest.city.id,
             "name": quest.city.name,
@@ -200,7 +324,7 @@ async def get_quest_details(
             "started_at": user_progress.startedAt if user_progress else None,
             "completed_at": user_progress.completedAt if user_progress else None
         } if user_progress else None
-    }
+    })
 
 @router.post("/{quest_id}/start", response_model=MessageResponse)
 async def start_quest(
@@ -210,74 +334,82 @@ async def start_quest(
 ):
     """Start a quest"""
     
-    # Check if quest exists and is available
-    quest = await db.quest.find_unique(where={"id": quest_id})
-    if not quest or not quest.isActive:
+    now = datetime.now(timezone.utc)
+    
+    try:
+        # Insert the progress row first and validate the quest it joins; any failed
+        # check raises inside the transaction and rolls the insert back
+        async with db.tx() as transaction:
+            progress = await transaction.questprogress.create(
+                data={
+                    "userId": current_user.id,
+                    "questId": quest_id,
+                    "status": "started",
+                    "pointsVisited": []
+                },
+                include={"quest": True}
+            )
+            quest = progress.quest
+            
+            # Check if quest is available
+            if not quest.isActive:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Quest not found or not available"
+                )
+            
+            # Check user level requirement
+            if current_user.level < quest.requiredLevel:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Required level {quest.requiredLevel}, current level {current_user.level}"
+                )
+            
+            # Check if quest is available (time constraints)
+            if quest.availableFrom and quest.availableFrom > now:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Quest not yet available"
+                )
+            
+            if quest.availableTo and quest.availableTo < now:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Quest no longer available"
+                )
+            
+            # Check max completions
+            if quest.maxCompletions and quest.currentCompletions >= quest.maxCompletions:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Quest has reached maximum completions"
+                )
+    except ForeignKeyViolationError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Quest not found or not available"
         )
-    
-    # Check user level requirement
-    if current_user.level < quest.requiredLevel:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Required level {quest.requiredLevel}, current level {current_user.level}"
-        )
-    
-    # Check if quest is available (time constraints)
-    now = datetime.utcnow()
-    if quest.availableFrom and quest.availableFrom > now:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Quest not yet available"
-        )
-    
-    if quest.availableTo and quest.availableTo < now:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Quest no longer available"
-        )
-    
-    # Check if user already has this quest in progress or completed
-    existing_progress = await db.questprogress.find_unique(
-        where={
-            "userId_questId": {
-                "userId": current_user.id,
-                "questId": quest_id
+    except UniqueViolationError:
+        # The user already has this quest in progress or completed
+        existing_progress = await db.questprogress.find_unique(
+            where={
+                "userId_questId": {
+                    "userId": current_user.id,
+                    "questId": quest_id
+                }
             }
-        }
-    )
-    
-    if existing_progress:
-        if existing_progress.status == "completed":
+        )
+        
+        if existing_progress and existing_progress.status == "completed":
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Quest already completed"
             )
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Quest already in progress"
-            )
-    
-    # Check max completions
-    if quest.maxCompletions and quest.currentCompletions >= quest.maxCompletions:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Quest has reached maximum completions"
+            detail="Quest already in progress"
         )
     
-    # Create quest progress
-    await db.questprogress.create(
-        data={
-            "userId": current_user.id,
-            "questId": quest_id,
-            "status": "started",
-            "pointsVisited": []
-        }
-    )
-    
     return MessageResponse(message="Quest started successfully")
 
 @router.post("/{quest_id}/verify-location", response_model=Dict[str, Any])
@@ -289,15 +421,16 @@ async def verify_location(
 ):
     """Verify user location for quest completion"""
     
-    # Get quest and user progress
+    now = datetime.now(timezone.utc)
+    
+    # Get user progress; quest geometry comes from the cache
     quest_progress = await db.questprogress.find_unique(
         where={
             "userId_questId": {
                 "userId": current_user.id,
                 "questId": quest_id
             }
-        },
-        include={"quest": {"include": {"questPoints": True}}}
+        }
     )
     
     if not quest_progress:
@@ -312,109 +445,127 @@ async def verify_location(
             detail="Quest already completed"
         )
     
-    quest = quest_progress.quest
+    quest = await get_quest_geometry(db, quest_id)
+    if not quest:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Quest not found"
+        )
     
     # Determine target location
     if location_proof.quest_point_id:
         # Specific quest point
-        quest_point = next(
-            (qp for qp in quest.questPoints if qp.id == location_proof.quest_point_id),
-            None
-        )
-        if not quest_point:
+        point_row = quest.point_rows.get(location_proof.quest_point_id)
+        if point_row is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Quest point not found"
             )
         
-        target_lat, target_lon = quest_point.latitude, quest_point.longitude
-        allowed_radius = quest_point.radius
+        target_lat = float(quest.point_lats[point_row])
+        target_lon = float(quest.point_lons[point_row])
+        allowed_radius = float(quest.point_radii[point_row])
     else:
         # Main quest location
         target_lat, target_lon = quest.latitude, quest.longitude
         allowed_radius = quest.radius
     
-    # Calculate distance
-    distance = calculate_distance(
+    # Check if within allowed radius on the tangent plane
+    distance_sq = tangent_plane_distance_sq(
         location_proof.latitude, location_proof.longitude,
         target_lat, target_lon
     )
+    is_within_radius = distance_sq <= allowed_radius * allowed_radius
     
-    # Check if within allowed radius
-    is_within_radius = distance <= allowed_radius
-    
-    # Create location proof record
-    proof = await db.locationproof.create(
-        data={
-            "userId": current_user.id,
-            "questPointId": location_proof.quest_point_id,
-            "latitude": location_proof.latitude,
-            "longitude": location_proof.longitude,
-            "accuracy": location_proof.accuracy,
-            "deviceInfo": location_proof.device_info,
-            "photoUrl": location_proof.photo_url,
-            "isVerified": is_within_radius
-        }
-    )
-    
-    unlock_available = False
-    quest_completed = False
-    
+    # Far-off proofs may be kilometers away, where only the great-circle distance is exact
     if is_within_radius:
-        # Update quest progress
-        points_visited = quest_progress.pointsVisited or []
-        
-        if location_proof.quest_point_id:
-            # Add quest point to visited list
-            if location_proof.quest_point_id not in points_visited:
-                points_visited.append(location_proof.quest_point_id)
+        distance = math.sqrt(distance_sq)
+    else:
+        distance = calculate_distance(
+            location_proof.latitude, location_proof.longitude,
+            target_lat, target_lon
+        )
+    
+    # Record the proof and any progress/reward updates atomically
+    async with db.tx() as transaction:
+        proof = await transaction.locationproof.create(
+            data={
+                "userId": current_user.id,
+                "questPointId": location_proof.quest_point_id,
+                "latitude": location_proof.latitude,
+                "longitude": location_proof.longitude,
+                "accuracy": location_proof.accuracy,
+                "deviceInfo": location_proof.device_info,
+                "photoUrl": location_proof.photo_url,
+                "isVerified": is_within_radius
+            }
+        )
         
-        # Check if quest can be completed
-        required_points = [qp.id for qp in quest.questPoints if not qp.isOptional]
-        all_required_visited = all(point_id in points_visited for point_id in required_points)
+        unlock_available = False
+        quest_completed = False
         
-        if all_required_visited or not quest.questPoints:  # Simple location quest
-            # Complete the quest
-            await db.questprogress.update(
-                where={"id": quest_progress.id},
-                data={
-                    "status": "completed",
-                    "pointsVisited": points_visited,
-                    "completedAt": datetime.utcnow(),
-                    "proofData": {
-                        "final_proof_id": proof.id,
-                        "completion_time": datetime.utcnow().isoformat()
-                    }
-                }
-            )
+        if is_within_radius:
+            # Update quest progress
+            points_visited = quest_progress.pointsVisited or []
             
-            # Update quest completion count
-            await db.quest.update(
-                where={"id": quest_id},
-                data={"currentCompletions": {"increment": 1}}
-            )
+            if location_proof.quest_point_id:
+                # Add quest point to visited list
+                if location_proof.quest_point_id not in points_visited:
+                    points_visited.append(location_proof.quest_point_id)
             
-            # Award XP and tokens
-            await db.user.update(
-                where={"id": current_user.id},
-                data={
-                    "totalXP": {"increment": quest.xpReward},
-                    "tokens": {"increment": quest.tokenReward}
-                }
-            )
+            # Check if quest can be completed
+            visited_mask = 0
+            for point_id in points_visited:
+                visited_row = quest.point_rows.get(point_id)
+                if visited_row is not None:
+                    visited_mask |= 1 << visited_row
+            all_required_visited = (visited_mask & quest.required_mask) == quest.required_mask
             
-            quest_completed = True
-            unlock_available = True
-        else:
-            # Update progress
-            await db.questprogress.update(
-                where={"id": quest_progress.id},
-                data={
-                    "status": "in_progress",
-                    "pointsVisited": points_visited
-                }
-            )
-            unlock_available = True
+            if all_required_visited or not quest.point_rows:  # Simple location quest
+                # Complete the quest
+                await transaction.questprogress.update(
+                    where={"id": quest_progress.id},
+                    data={
+                        "status": "completed",
+                        "pointsVisited": points_visited,
+                        "completedAt": now,
+                        "proofData": {
+                            "final_proof_id": proof.id,
+                            "completion_time": now.isoformat()
+                        }
+                    }
+                )
+                
+                # Update quest completion count
+                await transaction.quest.update(
+                    where={"id": quest_id},
+                    data={"currentCompletions": {"increment": 1}}
+                )
+                
+                # Award XP and tokens
+                await transaction.user.update(
+                    where={"id": current_user.id},
+                    data={
+                        "totalXP": {"increment": quest.xp_reward},
+                        "tokens": {"increment": quest.token_reward}
+                    }
+                )
+                
+                quest_completed = True
+                unlock_available = True
+            else:
+                # Update progress
+                await transaction.questprogress.update(
+                    where={"id": quest_progress.id},
+                    data={
+                        "status": "in_progress",
+                        "pointsVisited": points_visited
+                    }
+                )
+                unlock_available = True
+    
+    if quest_completed:
+        user_stats_cache.invalidate_user_stats(current_user.id)
     
     return {
         "location_verified": is_within_radius,
@@ -445,7 +596,7 @@ async def create_quest(
             detail="City not found"
         )
     
-    # Create quest
+    # Create quest together with its points
     quest = await db.quest.create(
         data={
             "title": quest_data.title,
@@ -456,6 +607,7 @@ async def create_quest(
             "latitude": quest_data.latitude,
             "longitude": quest_data.longitude,
             "radius": quest_data.radius,
+            "cellId": cell_id(quest_data.latitude, quest_data.longitude),
             "xpReward": quest_data.xp_reward,
             "tokenReward": quest_data.token_reward,
             "requiredLevel": quest_data.required_level,
@@ -465,43 +617,26 @@ async def create_quest(
             "maxCompletions": quest_data.max_completions,
             "requirements": quest_data.requirements,
             "hints": quest_data.hints,
-            "partnerInfo": quest_data.partner_info
+            "partnerInfo": quest_data.partner_info,
+            # Quest points are inserted in the same request and transaction as the quest
+            "questPoints": {
+                "create": [
+                    {
+                        "name": point_data.name,
+                        "description": point_data.description,
+                        "latitude": point_data.latitude,
+                        "longitude": point_data.longitude,
+                        "radius": point_data.radius,
+                        "order": point_data.order,
+                        "isOptional": point_data.is_optional
+                    }
+                    for point_data in quest_data.quest_points
+                ]
+            }
         }
     )
     
-    # Create quest points if provided
-    for point_data in quest_data.quest_points:
-        await db.questpoint.create(
-            data={
-                "questId": quest.id,
-                "name": point_data.name,
-                "description": point_data.description,
-                "latitude": point_data.latitude,
-                "longitude": point_data.longitude,
-                "radius": point_data.radius,
-                "order": point_data.order,
-                "isOptional": point_data.is_optional
-            }
-        )
-    
-    return QuestResponse(
-        id=quest.id,
-        title=quest.title,
-        description=quest.description,
-        type=quest.type,
-        difficulty=quest.difficulty,
-        city_id=quest.cityId,
-        latitude=quest.latitude,
-        longitude=quest.longitude,
-        radius=quest.radius,
-        xp_reward=quest.xpReward,
-        token_reward=quest.tokenReward,
-        required_level=quest.requiredLevel,
-        current_completions=quest.currentCompletions,
-        max_completions=quest.maxCompletions,
-        is_active=quest.isActive,
-        created_at=quest.createdAt
-    )
+    return quest_to_response(quest)
 
 @router.get("/nearby", response_model=List[QuestResponse])
 async def get_nearby_quests(
@@ -514,49 +649,17 @@ async def get_nearby_quests(
 ):
     """Get quests near user's location"""
     
-    # Get all active quests
-    quests = await db.quest.find_many(
-        where={
-            "isActive": True,
-            "requiredLevel": {"lte": current_user.level}
-        },
-        include={"city": True}
+    # Candidate quests come from cellId index ranges; filtering and top-k run in SQL
+    cell_ranges = covering_cell_ranges(latitude, longitude, radius_km)
+    rows = await db.query_raw(
+        NEARBY_QUESTS_SQL,
+        [low for low, _ in cell_ranges],
+        [high for _, high in cell_ranges],
+        current_user.level,
+        latitude,
+        longitude,
+        radius_km * 1000,
+        limit
     )
     
-    # Filter by distance
-    nearby_quests = []
-    user_location = (latitude, longitude)
-    radius_meters = radius_km * 1000
-    
-    for quest in quests:
-        quest_location = (quest.latitude, quest.longitude)
-        distance = geodesic(user_location, quest_location).meters
-        
-        if distance <= radius_meters:
-            nearby_quests.append((quest, distance))
-    
-    # Sort by distance and take limited results
-    nearby_quests.sort(key=lambda x: x[1])
-    nearby_quests = nearby_quests[:limit]
-    
-    return [
-        QuestResponse(
-            id=quest.id,
-            title=quest.title,
-            description=quest.description,
-            type=quest.type,
-            difficulty=quest.difficulty,
-            city_id=quest.cityId,
-            latitude=quest.latitude,
-            longitude=quest.longitude,
-            radius=quest.radius,
-            xp_reward=quest.xpReward,
-            token_reward=quest.tokenReward,
-            required_level=quest.requiredLevel,
-            current_completions=quest.currentCompletions,
-            max_completions=quest.maxCompletions,
-            is_active=quest.isActive,
-            created_at=quest.createdAt
-        )
-        for quest, _ in nearby_quests
-    ]
\ No newline at end of file
+    return ORJSONResponse(rows)
@@ -1,13 +1,24 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Query
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from fastapi import APIRouter, HTTPException, Depends, status, Query, Header
+from fastapi.responses import Response
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime, timedelta, timezone
 import statistics
 import logging
 import asyncio, random
-from geopy.distance import geodesic
+import time
+from dataclasses import dataclass
+from collections import defaultdict
+from functools import lru_cache
+from bisect import bisect_right
+import numpy as np
+import orjson
+from numba import njit, prange
+from prisma.errors import ForeignKeyViolationError
 
 from app.core.database import get_db
 from app.core.config import settings
+from app.core.geo import SphereIndex, bounding_box_filter, haversine_distances, point_distances
+from app.core import safety_cache, user_stats_cache
 from app.api.routes.auth import get_current_user
 from app.services.news_scraping_agent import news_agent
 from app.services.news_analysis_ai import news_analysis_ai
@@ -23,77 +34,406 @@ from app.models.schemas import (
 
 router = APIRouter()
 
-class SafetyIndexCalculator:
-    """Calculate live safety index for cities and areas"""
-    
-    @staticmethod
-    def calculate_time_factor(hour: int) -> float:
-        """Calculate time-based safety factor (0-1)"""
-        # Lower safety during late night hours (22:00 - 06:00)
-        if 22 <= hour or hour <= 6:
-            return 0.6
-        # Peak safety during day hours (08:00 - 18:00)
-        elif 8 <= hour <= 18:
-            return 1.0
-        # Medium safety during evening (18:00 - 22:00) and early morning (06:00 - 08:00)
-        else:
-            return 0.8
+# Distinct recently active users with progress on any of a city's quests, as one indexed join
+ACTIVE_CITY_USERS_SQL = '''
+    SELECT count(DISTINCT qp."userId")::int AS active_users
+    FROM "quest_progress" qp
+    JOIN "quests" q ON q."id" = qp."questId"
+    JOIN "users" u ON u."id" = qp."userId"
+    WHERE q."cityId" = $1
+      AND u."lastActiveAt" >= $2::timestamp
+'''
+
+# Verified location proofs within a radius, counted in the database: indexed
+# bounding-box ranges narrow the rows and an exact haversine decides the rest
+AREA_PROOF_COUNT_SQL = '''
+    SELECT count(*)::int AS proofs
+    FROM "location_proofs" p
+    WHERE p."timestamp" >= $1::timestamp
+      AND p."isVerified" = true
+      AND p."latitude" BETWEEN $2::float8 AND $3::float8
+      AND ($4::float8 IS NULL OR p."longitude" BETWEEN $4::float8 AND $5::float8)
+      AND 2 * 6371000 * asin(sqrt(LEAST(1,
+          power(sin(radians(p."latitude" - $6::float8) / 2), 2) +
+          cos(radians($6::float8)) * cos(radians(p."latitude")) *
+          power(sin(radians(p."longitude" - $7::float8) / 2), 2)
+      ))) <= $8::float8
+'''
+
+# Report columns the safety factors read; point lookups add the coordinates
+REPORT_FACTOR_FIELDS = {"type": True, "severity": True, "reportedAt": True}
+REPORT_POINT_FIELDS = {**REPORT_FACTOR_FIELDS, "latitude": True, "longitude": True}
+
+# Article columns the news factor reads, so the rest of each article never leaves the database
+NEWS_FACTOR_ARTICLE_FIELDS = {
+    "id": True,
+    "cityId": True,
+    "latitude": True,
+    "longitude": True,
+    "locationRadius": True,
+    "threatLevel": True,
+    "confidence": True,
+    "sentimentPolarity": True,
+    "processedAt": True
+}
+
+NEWS_FACTOR_IMPACT_FIELDS = {
+    "newsArticleId": True,
+    "impactFactor": True,
+    "weightFactor": True,
+    "decayFactor": True
+}
+
+# Verified report counts per type for a city since a cutoff
+CITY_REPORT_TYPE_COUNTS_SQL = '''
+    SELECT "type"::text AS report_type, count(*)::int AS report_count
+    FROM "safety_reports"
+    WHERE "cityId" = $1
+      AND "reportedAt" >= $2::timestamp
+      AND "isVerified" = true
+    GROUP BY "type"
+'''
+
+# Reports within a radius: indexed bounding-box ranges, exact haversine, and
+# paging applied after the distance filter. Unused filters are passed as NULL
+NEARBY_SAFETY_REPORTS_SQL = '''
+    SELECT r."id" AS id,
+           r."cityId" AS city_id,
+           r."latitude" AS latitude,
+           r."longitude" AS longitude,
+           r."type"::text AS type,
+           r."severity" AS severity,
+           r."description" AS description,
+           r."isVerified" AS is_verified,
+           r."reportedAt" AS reported_at
+    FROM "safety_reports" r
+    WHERE r."reportedAt" >= $1::timestamp
+      AND r."isActive" = true
+      AND ($2::text IS NULL OR r."cityId" = $2::text)
+      AND ($3::text IS NULL OR r."type"::text = $3::text)
+      AND (NOT $4::boolean OR r."isVerified" = true)
+      AND r."latitude" BETWEEN $5::float8 AND $6::float8
+      AND ($7::float8 IS NULL OR r."longitude" BETWEEN $7::float8 AND $8::float8)
+      AND 2 * 6371000 * asin(sqrt(LEAST(1,
+          power(sin(radians(r."latitude" - $9::float8) / 2), 2) +
+          cos(radians($9::float8)) * cos(radians(r."latitude")) *
+          power(sin(radians(r."longitude" - $10::float8) / 2), 2)
+      ))) <= $11::float8
+    ORDER BY r."reportedAt" DESC
+    LIMIT $12 OFFSET $13
+'''
+
+# Report types that raise / lower an area's safety score
+POSITIVE_REPORT_TYPES = frozenset(report_type.value for report_type in (
+    SafetyReportType.WELL_LIT,
+    SafetyReportType.POLICE_PRESENCE,
+    SafetyReportType.CROWDED_AREA,
+    SafetyReportType.EMERGENCY_SERVICES,
+    SafetyReportType.SAFE_TRANSPORT
+))
+NEGATIVE_REPORT_TYPES = frozenset(report_type.value for report_type in (
+    SafetyReportType.UNSAFE_AREA,
+    SafetyReportType.UNSAFE_TRANSPORT,
+    SafetyReportType.TOURIST_SCAM,
+    SafetyReportType.PICKPOCKET_RISK
+))
+
+# Report types as small integer codes, with lookup tables for the compiled kernel
+REPORT_TYPE_CODES = {report_type.value: code for code, report_type in enumerate(SafetyReportType)}
+_IS_POSITIVE_TYPE = np.zeros(len(REPORT_TYPE_CODES), dtype=np.bool_)
+_IS_POSITIVE_TYPE[[REPORT_TYPE_CODES[report_type] for report_type in POSITIVE_REPORT_TYPES]] = True
+_IS_NEGATIVE_TYPE = np.zeros(len(REPORT_TYPE_CODES), dtype=np.bool_)
+_IS_NEGATIVE_TYPE[[REPORT_TYPE_CODES[report_type] for report_type in NEGATIVE_REPORT_TYPES]] = True
+
+SECONDS_PER_DAY = 86400.0
+
+def utc_timestamp(value: datetime) -> float:
+    """POSIX timestamp of a datetime, reading naive values as UTC like the rest of this module"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+async def fetch_pages(model, where: Dict[str, Any], page_size: int, select: Optional[Dict[str, bool]] = None):
+    """Yield find_many results a page at a time in id order, walking a cursor so memory stays bounded"""
+    cursor = None
+    while True:
+        page = await model.find_many(
+            where=where,
+            take=page_size,
+            order={"id": "asc"},
+            # The cursor needs each page's ids, so a column selection always keeps them
+            **({"select": {**select, "id": True}} if select else {}),
+            **({"cursor": {"id": cursor}, "skip": 1} if cursor else {})
+        )
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        cursor = page[-1].id
+
+def report_arrays(reports: List[Any], now_ts: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Type codes, severities and whole-day ages of Prisma safety reports as parallel
+    arrays. Types (< 16 codes) and severities (1-10) fit in int8
+    """
+    count = len(reports)
+    types = np.fromiter((REPORT_TYPE_CODES[report.type] for report in reports), dtype=np.int8, count=count)
+    severities = np.fromiter((report.severity for report in reports), dtype=np.int8, count=count)
+    ages_days = np.fromiter(
+        ((now_ts - utc_timestamp(report.reportedAt)) // SECONDS_PER_DAY for report in reports),
+        dtype=np.float32, count=count
+    )
+    return types, severities, ages_days
+
+@lru_cache(maxsize=8)
+def make_report_kernels(decay_days: float, weight_floor: float) -> tuple:
+    """
+    Compile the reports factor kernels with the decay constants and the
+    positive/negative type tables frozen in as compile-time constants. Returns
+    (reports factor kernel, fused area kernel, heatmap cell kernel), once per
+    parameter pair
+    """
+    # Closure arrays are baked into the compiled code, so freeze private copies
+    is_positive = _IS_POSITIVE_TYPE.copy()
+    is_negative = _IS_NEGATIVE_TYPE.copy()
     
-    @staticmethod
-    def calculate_density_factor(active_users_count: int) -> float:
-        """Calculate density-based safety factor based on active users"""
-        if active_users_count >= 20:
-            return 1.0  # High density = safer
-        elif active_users_count >= 10:
-            return 0.8
-        elif active_users_count >= 5:
-            return 0.6
+    @njit(fastmath=True)
+    def report_contribution(report_type, severity, age_days):
+        # More recent reports have higher weight
+        weight = max(weight_floor, 1.0 - age_days / decay_days)
+        
+        if is_positive[report_type]:
+            score = severity / 10.0  # Positive impact
+        elif is_negative[report_type]:
+            score = 1.0 - severity / 10.0  # Negative impact
         else:
-            return 0.4  # Low density = less safe
-    
-    @staticmethod
-    def calculate_reports_factor(reports: List[Dict]) -> float:
-        """Calculate safety factor based on recent safety reports"""
-        if not reports:
-            return 0.5  # Neutral when no data
+            score = 0.5  # Neutral
         
-        positive_types = [
-            SafetyReportType.WELL_LIT,
-            SafetyReportType.POLICE_PRESENCE,
-            SafetyReportType.CROWDED_AREA,
-            SafetyReportType.EMERGENCY_SERVICES,
-            SafetyReportType.SAFE_TRANSPORT
-        ]
+        return weight, score
+    
+    @njit(fastmath=True)
+    def reports_factor_kernel(types, severities, ages_days) -> float:
+        # Parallel arrays of int8 type codes and severities and float32 ages;
+        # values are upcast only for the arithmetic
+        weighted_score = 0.0
+        total_weight = 0.0
         
-        negative_types = [
-            SafetyReportType.UNSAFE_AREA,
-            SafetyReportType.UNSAFE_TRANSPORT,
-            SafetyReportType.TOURIST_SCAM,
-            SafetyReportType.PICKPOCKET_RISK
-        ]
+        for i in range(types.shape[0]):
+            weight, score = report_contribution(types[i], severities[i], ages_days[i])
+            weighted_score += score * weight
+            total_weight += weight
         
-        weighted_score = 0
-        total_weight = 0
+        return weighted_score / total_weight if total_weight > 0 else 0.5
+    
+    @njit(fastmath=True)
+    def area_reports_kernel(xyz, center, chord_sq, types, severities, reported_at, now_ts, cutoff_ts):
+        # Radius test, age cutoff and reports factor in one pass over a band of the
+        # recent report index; returns (reports in radius, reports factor)
+        count = 0
+        weighted_score = 0.0
+        total_weight = 0.0
         
-        for report in reports:
-            # More recent reports have higher weight
-            days_old = (datetime.utcnow() - report['reported_at']).days
-            weight = max(0.1, 1 - (days_old / 30))  # Decay over 30 days
-            
-            if report['type'] in positive_types:
-                score = (report['severity'] / 10.0)  # Positive impact
-            elif report['type'] in negative_types:
-                score = 1 - (report['severity'] / 10.0)  # Negative impact
-            else:
-                score = 0.5  # Neutral
+        for i in range(xyz.shape[0]):
+            dx = xyz[i, 0] - center[0]
+            dy = xyz[i, 1] - center[1]
+            dz = xyz[i, 2] - center[2]
+            if dx * dx + dy * dy + dz * dz > chord_sq or reported_at[i] < cutoff_ts:
+                continue
             
+            age_days = (now_ts - reported_at[i]) // 86400.0
+            weight, score = report_contribution(types[i], severities[i], age_days)
             weighted_score += score * weight
             total_weight += weight
+            count += 1
         
-        return weighted_score / total_weight if total_weight > 0 else 0.5
+        return count, (weighted_score / total_weight if total_weight > 0 else 0.5)
+    
+    @njit(fastmath=True, parallel=True)
+    def score_cells_kernel(order, starts, types, severities, ages_days):
+        # Reports grouped by heatmap cell: cell c owns order[starts[c]:starts[c + 1]],
+        # so every thread sums its own cells and nothing is shared between them
+        cell_scores = np.empty(starts.shape[0] - 1)
+        
+        for c in prange(cell_scores.shape[0]):
+            weighted_score = 0.0
+            total_weight = 0.0
+            for j in range(starts[c], starts[c + 1]):
+                i = order[j]
+                weight, score = report_contribution(types[i], severities[i], ages_days[i])
+                weighted_score += score * weight
+                total_weight += weight
+            # Every weight is at least the floor, so no cell divides by zero
+            cell_scores[c] = weighted_score / total_weight * 10
+        
+        return cell_scores
+    
+    return reports_factor_kernel, area_reports_kernel, score_cells_kernel
+
+_reports_factor_kernel, _area_reports_kernel, _score_cells_kernel = make_report_kernels(
+    settings.SAFETY_REPORT_DECAY_DAYS, settings.SAFETY_REPORT_MIN_WEIGHT
+)
+
+# Compile at import with the dtypes the routes pass, so no request pays for it
+_warm_types = np.zeros(1, dtype=np.int8)
+_warm_severities = np.zeros(1, dtype=np.int8)
+_reports_factor_kernel(_warm_types, _warm_severities, np.zeros(1, dtype=np.float32))
+_area_reports_kernel(
+    np.zeros((1, 3)), np.zeros(3), 0.0, _warm_types, _warm_severities, np.zeros(1), 0.0, 0.0
+)
+_score_cells_kernel(
+    np.zeros(1, dtype=np.intp), np.array([0, 1], dtype=np.int64),
+    _warm_types, _warm_severities, np.zeros(1, dtype=np.float32)
+)
+del _warm_types, _warm_severities
+
+@dataclass(slots=True)
+class RecentReportIndex:
+    """
+    Verified reports from the last 30 days as parallel arrays, stored in the sphere
+    index's sorted order so a latitude band is one contiguous slice of each
+    """
+    expires_at: float
+    points: SphereIndex
+    types: np.ndarray
+    severities: np.ndarray
+    reported_at: np.ndarray  # POSIX timestamps
+
+_recent_report_index: Optional[RecentReportIndex] = None
+_recent_report_index_lock = asyncio.Lock()
+
+async def recent_report_index(db) -> RecentReportIndex:
+    """Shared index of recent verified reports, rebuilt once it is SAFETY_TREE_TTL seconds old"""
+    global _recent_report_index
+    
+    index = _recent_report_index
+    if index is not None and index.expires_at > time.monotonic():
+        return index
+    
+    async with _recent_report_index_lock:
+        # Another request may have rebuilt it while this one waited
+        index = _recent_report_index
+        if index is not None and index.expires_at > time.monotonic():
+            return index
+        
+        lats, lons, types, severities, reported_at = [], [], [], [], []
+        async for page in fetch_pages(
+            db.safetyreport,
+            {
+                "reportedAt": {"gte": datetime.utcnow() - timedelta(days=30)},
+                "isVerified": True
+            },
+            settings.SAFETY_MAX_FETCH,
+            select=REPORT_POINT_FIELDS
+        ):
+            count = len(page)
+            lats.append(np.fromiter((report.latitude for report in page), dtype=np.float64, count=count))
+            lons.append(np.fromiter((report.longitude for report in page), dtype=np.float64, count=count))
+            types.append(np.fromiter(
+                (REPORT_TYPE_CODES[report.type] for report in page), dtype=np.int8, count=count
+            ))
+            severities.append(np.fromiter((report.severity for report in page), dtype=np.int8, count=count))
+            reported_at.append(np.fromiter(
+                (utc_timestamp(report.reportedAt) for report in page), dtype=np.float64, count=count
+            ))
+        
+        def concat(chunks, dtype):
+            return np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+        
+        points = SphereIndex(concat(lats, np.float64), concat(lons, np.float64))
+        _recent_report_index = RecentReportIndex(
+            expires_at=time.monotonic() + settings.SAFETY_TREE_TTL,
+            points=points,
+            types=concat(types, np.int8)[points.order],
+            severities=concat(severities, np.int8)[points.order],
+            reported_at=concat(reported_at, np.float64)[points.order]
+        )
+        return _recent_report_index
+
+def invalidate_recent_report_index():
+    """Force the next area query to rebuild the recent report index"""
+    global _recent_report_index
+    _recent_report_index = None
+
+# Active cities with their coordinates as arrays: (expires_at, cities, latitudes, longitudes)
+CITY_POINTS_TTL_SECONDS = 600
+_city_points: Optional[tuple] = None
+
+async def nearest_city(latitude: float, longitude: float, db) -> Tuple[Optional[Any], float]:
+    """Closest active city to a point and its distance in km, scanning cached city coordinates"""
+    global _city_points
+    
+    if _city_points is None or _city_points[0] <= time.monotonic():
+        cities = await db.city.find_many(where={"isActive": True})
+        count = len(cities)
+        _city_points = (
+            time.monotonic() + CITY_POINTS_TTL_SECONDS,
+            cities,
+            np.fromiter((city.latitude for city in cities), dtype=np.float64, count=count),
+            np.fromiter((city.longitude for city in cities), dtype=np.float64, count=count)
+        )
+    
+    _, cities, lats, lons = _city_points
+    if not cities:
+        return None, float("inf")
+    
+    distances = haversine_distances(latitude, longitude, lats, lons)
+    closest_index = int(np.argmin(distances))
+    return cities[closest_index], float(distances[closest_index]) / 1000
+
+# Time factor per hour of day: lower safety during late night hours (22:00 - 06:00),
+# peak safety during day hours (08:00 - 18:00), medium safety during evening
+# (18:00 - 22:00) and early morning (06:00 - 08:00)
+TIME_FACTORS = tuple(
+    0.6 if 22 <= hour or hour <= 6 else 1.0 if 8 <= hour <= 18 else 0.8
+    for hour in range(24)
+)
+
+# Active user counts at which density moves up a bucket, and each bucket's factor
+# (low density = less safe, high density = safer)
+DENSITY_BREAKPOINTS = (5, 10, 20)
+DENSITY_FACTORS = (0.4, 0.6, 0.8, 1.0)
+
+# Index weights, read from settings once. The reports, time and density weights are
+# reduced proportionally to leave 20% weight for news data
+REPORTS_WEIGHT = settings.SAFETY_INDEX_WEIGHT_REPORTS * 0.8
+TIME_WEIGHT = settings.SAFETY_INDEX_WEIGHT_TIME * 0.8
+DENSITY_WEIGHT = settings.SAFETY_INDEX_WEIGHT_DENSITY * 0.8
+NEWS_WEIGHT = 0.2
+
+def calculate_time_factor(hour: int) -> float:
+    """Calculate time-based safety factor (0-1)"""
+    return TIME_FACTORS[hour]
+
+def calculate_density_factor(active_users_count: int) -> float:
+    """Calculate density-based safety factor based on active users"""
+    return DENSITY_FACTORS[bisect_right(DENSITY_BREAKPOINTS, active_users_count)]
+
+class SafetyIndexCalculator:
+    """Calculate live safety index for cities and areas"""
     
     @staticmethod
-    async def calculate_news_factor(city_id: str, latitude: float, longitude: float, db) -> float:
+    def calculate_reports_factor(types: np.ndarray, severities: np.ndarray, ages_days: np.ndarray) -> float:
+        """
+        Calculate safety factor based on recent safety reports, given as parallel
+        arrays of type codes, severities and whole-day ages (see report_arrays)
+        """
+        if len(types) == 0:
+            return 0.5  # Neutral when no data
+        
+        return _reports_factor_kernel(types, severities, ages_days)
+    
+    @classmethod
+    async def calculate_news_factor(cls, city_id: str, latitude: float, longitude: float, db) -> float:
+        """Calculate news-based safety factor, cached per city and ~1km location"""
+        key = (city_id, round(latitude, 2), round(longitude, 2))
+        news_factor = safety_cache.get_news_factor(key)
+        if news_factor is None:
+            news_factor = await cls._compute_news_factor(city_id, latitude, longitude, db)
+            safety_cache.store_news_factor(key, news_factor)
+        return news_factor
+    
+    @staticmethod
+    async def _compute_news_factor(city_id: str, latitude: float, longitude: float, db) -> float:
         """Calculate news-based safety factor"""
         try:
             # Get recent news articles for the city (last 7 days)
@@ -113,28 +453,30 @@ class SafetyIndexCalculator:
                     "processedAt": {"gte": seven_days_ago},
                     "isRelevant": True,
                     "isProcessed": True
-                }
+                },
+                select=NEWS_FACTOR_ARTICLE_FIELDS
             )
             
             if not news_articles:
                 return 1.0  # Neutral if no news data
             
-            # Filter articles by geographic proximity if lat/lng available
-            relevant_articles = []
-            target_location = (latitude, longitude)
+            # Filter articles by geographic proximity if lat/lng available, in one vectorized pass
+            located = [article for article in news_articles if article.latitude and article.longitude]
+            distances_km = point_distances(located, latitude, longitude) / 1000
             
-            for article in news_articles:
-                if article.latitude and article.longitude:
-                    article_location = (article.latitude, article.longitude)
-                    distance_km = geodesic(target_location, article_location).kilometers
-                    
-                    # Include if within location radius or 50km default
-                    max_distance = article.locationRadius or 50.0
-                    if distance_km <= max_distance:
-                        relevant_articles.append(article)
-                elif article.cityId == city_id:
-                    # Include if directly associated with city
-                    relevant_articles.append(article)
+            # Include if within location radius or 50km default
+            max_distances = np.fromiter(
+                (article.locationRadius or 50.0 for article in located), dtype=np.float64, count=len(located)
+            )
+            relevant_articles = {
+                located[i].id: located[i] for i in np.flatnonzero(distances_km <= max_distances).tolist()
+            }
+            
+            # Include articles without coordinates if directly associated with city
+            relevant_articles.update(
+                (article.id, article) for article in news_articles
+                if not (article.latitude and article.longitude) and article.cityId == city_id
+            )
             
             if not relevant_articles:
                 return 1.0  # Neutral if no geographically relevant articles
@@ -143,14 +485,20 @@ class SafetyIndexCalculator:
             total_impact = 0.0
             total_weight = 0.0
             
-            for article in relevant_articles:
-                # Get news safety impacts
-                impacts = await db.newssafetyimpact.find_many(
-                    where={
-                        "newsArticleId": article.id,
-                        "isActive": True
-                    }
-                )
+            # Get news safety impacts for every relevant article in one query
+            impacts_by_article = defaultdict(list)
+            for impact in await db.newssafetyimpact.find_many(
+                where={
+                    "newsArticleId": {"in": list(relevant_articles)},
+                    "isActive": True
+                },
+                select=NEWS_FACTOR_IMPACT_FIELDS
+            ):
+                impacts_by_article[impact.newsArticleId].append(impact)
+            
+            now = datetime.utcnow()
+            for article_id, article in relevant_articles.items():
+                impacts = impacts_by_article.get(article_id)
                 
                 if impacts:
                     # Use calculated impact factors
@@ -176,7 +524,7 @@ class SafetyIndexCalculator:
                     safety_factor += sentiment_adjustment
                     
                     # Weight by confidence and recency
-                    days_old = (datetime.utcnow() - article.processedAt).days if article.processedAt else 7
+                    days_old = (now - article.processedAt).days if article.processedAt else 7
                     recency_weight = max(0.1, 1.0 - (days_old / 7.0))  # 7-day decay
                     weight = confidence * recency_weight
                     
@@ -199,70 +547,55 @@ class SafetyIndexCalculator:
     async def calculate_city_safety_index(cls, city_id: str, db) -> float:
         """Calculate comprehensive safety index for a city"""
         
-        # Get recent safety reports (last 30 days)
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        reports = await db.safetyreport.find_many(
-            where={
-                "cityId": city_id,
-                "reportedAt": {"gte": thirty_days_ago},
-                "isVerified": True
-            }
-        )
+        # Get city coordinates for news analysis; the news lookup depends on them
+        async def city_news_factor() -> float:
+            city = await db.city.find_unique(
+                where={"id": city_id}, select={"latitude": True, "longitude": True}
+            )
+            if city:
+                return await cls.calculate_news_factor(
+                    city_id, city.latitude, city.longitude, db
+                )
+            return 1.0  # Neutral if city not found
         
-        # Get active users in the city (users with recent activity)
-        recent_activity = datetime.utcnow() - timedelta(hours=24)
-        active_users = await db.user.count(
-            where={
-                "lastActiveAt": {"gte": recent_activity},
-                "questProgresses": {
-                    "some": {
-                        "quest": {"cityId": city_id}
-                    }
-                }
-            }
+        # Recent safety reports (last 30 days), active users in the city (users with
+        # recent activity) and the news chain are independent, so run them together
+        now = datetime.utcnow()
+        thirty_days_ago = now - timedelta(days=30)
+        recent_activity = now - timedelta(hours=24)
+        reports, active_rows, news_factor = await asyncio.gather(
+            db.safetyreport.find_many(
+                where={
+                    "cityId": city_id,
+                    "reportedAt": {"gte": thirty_days_ago},
+                    "isVerified": True
+                },
+                select=REPORT_FACTOR_FIELDS
+            ),
+            db.query_raw(ACTIVE_CITY_USERS_SQL, city_id, recent_activity),
+            city_news_factor()
         )
+        active_users = int(active_rows[0]["active_users"]) if active_rows else 0
         
         # Calculate factors
-        current_hour = datetime.utcnow().hour
-        time_factor = cls.calculate_time_factor(current_hour)
-        density_factor = cls.calculate_density_factor(active_users)
+        current_hour = now.hour
+        time_factor = calculate_time_factor(current_hour)
+        density_factor = calculate_density_factor(active_users)
         
-        # Convert reports to dict format for compatibility
-        reports_data = [
-            {
-                "type": report.type,
-                "severity": report.severity,
-                "reported_at": report.reportedAt
-            }
-            for report in reports
-        ]
-        reports_factor = cls.calculate_reports_factor(reports_data)
-        
-        # Get city coordinates for news analysis
-        city = await db.city.find_unique(where={"id": city_id})
-        if city:
-            news_factor = await cls.calculate_news_factor(
-                city_id, city.latitude, city.longitude, db
-            )
-        else:
-            news_factor = 1.0  # Neutral if city not found
+        reports_factor = cls.calculate_reports_factor(
+            *report_arrays(reports, utc_timestamp(now))
+        )
         
         # Enhanced weighted average including news data
-        # Adjust weights to include news factor (reduce other weights proportionally)
-        reports_weight = settings.SAFETY_INDEX_WEIGHT_REPORTS * 0.8
-        time_weight = settings.SAFETY_INDEX_WEIGHT_TIME * 0.8  
-        density_weight = settings.SAFETY_INDEX_WEIGHT_DENSITY * 0.8
-        news_weight = 0.2  # 20% weight for news data
-        
         safety_index = (
-            reports_factor * reports_weight +
-            time_factor * time_weight +
-            density_factor * density_weight
+            reports_factor * REPORTS_WEIGHT +
+            time_factor * TIME_WEIGHT +
+            density_factor * DENSITY_WEIGHT
         ) * news_factor  # News factor as multiplier
         
         # Apply news weight if significantly different from neutral
         if abs(news_factor - 1.0) > 0.1:
-            news_contribution = (news_factor - 1.0) * news_weight
+            news_contribution = (news_factor - 1.0) * NEWS_WEIGHT
             safety_index += news_contribution
         
         # Ensure safety_index stays within bounds [0, 1]
@@ -277,82 +610,75 @@ class SafetyIndexCalculator:
     ) -> Dict[str, Any]:
         """Calculate safety index for a specific area"""
         
-        # Get recent safety reports in the area
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        all_reports = await db.safetyreport.find_many(
-            where={
-                "reportedAt": {"gte": thirty_days_ago},
-                "isVerified": True
-            }
-        )
+        now = datetime.utcnow()
         
-        # Filter reports by distance
-        area_reports = []
-        center_location = (latitude, longitude)
+        # Bounding box for the indexed proof range scan
+        area_bbox = bounding_box_filter(latitude, longitude, radius_km)
         radius_meters = radius_km * 1000
         
-        for report in all_reports:
-            report_location = (report.latitude, report.longitude)
-            distance = geodesic(center_location, report_location).meters
+        # Recent reports in the radius come from the shared point index
+        async def area_reports_factor() -> tuple:
+            index = await recent_report_index(db)
+            start, stop, center, chord_sq = index.points.band(latitude, longitude, radius_meters)
             
-            if distance <= radius_meters:
-                area_reports.append({
-                    "type": report.type,
-                    "severity": report.severity,
-                    "reported_at": report.reportedAt,
-                    "distance": distance
-                })
-        
-        # Get recent location proofs in the area (indicates activity)
-        recent_proofs = await db.locationproof.find_many(
-            where={
-                "timestamp": {"gte": datetime.utcnow() - timedelta(hours=24)},
-                "isVerified": True
-            }
-        )
+            # Entries can age past the 30-day window while the index is cached
+            now_ts = utc_timestamp(now)
+            return _area_reports_kernel(
+                index.points.xyz[start:stop],
+                center,
+                chord_sq,
+                index.types[start:stop],
+                index.severities[start:stop],
+                index.reported_at[start:stop],
+                now_ts,
+                now_ts - 30 * SECONDS_PER_DAY
+            )
         
-        # Filter proofs by distance
-        area_activity = 0
-        for proof in recent_proofs:
-            proof_location = (proof.latitude, proof.longitude)
-            distance = geodesic(center_location, proof_location).meters
-            
-            if distance <= radius_meters:
-                area_activity += 1
+        # Count recent location proofs within the radius (indicates activity)
+        async def count_area_proofs() -> int:
+            longitude_range = area_bbox.get("longitude", {})
+            rows = await db.query_raw(
+                AREA_PROOF_COUNT_SQL,
+                now - timedelta(hours=24),
+                area_bbox["latitude"]["gte"],
+                area_bbox["latitude"]["lte"],
+                longitude_range.get("gte"),
+                longitude_range.get("lte"),
+                latitude,
+                longitude,
+                radius_meters
+            )
+            return rows[0]["proofs"] if rows else 0
         
-        # Calculate factors
-        current_hour = datetime.utcnow().hour
-        time_factor = cls.calculate_time_factor(current_hour)
-        density_factor = cls.calculate_density_factor(area_activity)
-        reports_factor = cls.calculate_reports_factor(area_reports)
+        # Calculate news factor for the area, from the closest city for news context
+        async def area_news_factor() -> float:
+            closest_city, _ = await nearest_city(latitude, longitude, db)
+            if closest_city:
+                return await cls.calculate_news_factor(
+                    closest_city.id, latitude, longitude, db
+                )
+            return 1.0
         
-        # Calculate news factor for the area
-        # Find the closest city for news context
-        closest_city = await db.city.find_first(
-            order={"latitude": "asc"}  # This is simplified; ideally calculate actual distance
+        # The three lookups are independent, so overlap their round trips
+        (total_reports, reports_factor), area_activity, news_factor = await asyncio.gather(
+            area_reports_factor(), count_area_proofs(), area_news_factor()
         )
         
-        if closest_city:
-            news_factor = await cls.calculate_news_factor(
-                closest_city.id, latitude, longitude, db
-            )
-        else:
-            news_factor = 1.0
+        # Calculate factors
+        current_hour = now.hour
+        time_factor = calculate_time_factor(current_hour)
+        density_factor = calculate_density_factor(area_activity)
         
         # Enhanced weighted average including news data
-        reports_weight = settings.SAFETY_INDEX_WEIGHT_REPORTS * 0.8
-        time_weight = settings.SAFETY_INDEX_WEIGHT_TIME * 0.8
-        density_weight = settings.SAFETY_INDEX_WEIGHT_DENSITY * 0.8
-        
         safety_index = (
-            reports_factor * reports_weight +
-            time_factor * time_weight +
-            density_factor * density_weight
+            reports_factor * REPORTS_WEIGHT +
+            time_factor * TIME_WEIGHT +
+            density_factor * DENSITY_WEIGHT
         ) * news_factor
         
         # Apply news adjustment if significant
         if abs(news_factor - 1.0) > 0.1:
-            news_contribution = (news_factor - 1.0) * 0.2
+            news_contribution = (news_factor - 1.0) * NEWS_WEIGHT
             safety_index += news_contribution
         
         # Clamp to valid range
@@ -367,7 +693,7 @@ class SafetyIndexCalculator:
                 "news_factor": round(news_factor, 3)
             },
             "data": {
-                "total_reports": len(area_reports),
+                "total_reports": total_reports,
                 "recent_activity": area_activity,
                 "current_hour": current_hour,
                 "analysis_radius_km": radius_km,
@@ -375,6 +701,64 @@ class SafetyIndexCalculator:
             }
         }
 
+async def cached_city_safety_index(city_id: str, db, refresh: bool = False) -> float:
+    """City safety index from the TTL cache, recomputing on a miss or when refresh is requested"""
+    if not refresh:
+        safety_index = safety_cache.get_city_safety_index(city_id)
+        if safety_index is not None:
+            return safety_index
+    
+    safety_index = await SafetyIndexCalculator.calculate_city_safety_index(city_id, db)
+    safety_cache.store_city_safety_index(city_id, safety_index)
+    return safety_index
+
+async def _recompute_and_update(city_id: str, db):
+    """Recompute a city's safety index and store it on the city"""
+    try:
+        safety_index = await cached_city_safety_index(city_id, db, refresh=True)
+        await db.city.update(
+            where={"id": city_id},
+            data={"safetyIndex": safety_index}
+        )
+    except Exception as e:
+        logging.warning(f"Safety index recompute failed for city {city_id}: {e}")
+
+async def _store_city_safety_index(city_id: str, safety_index: float, db):
+    """Store an already computed safety index on the city"""
+    try:
+        await db.city.update(
+            where={"id": city_id},
+            data={"safetyIndex": safety_index}
+        )
+    except Exception as e:
+        logging.warning(f"Safety index update failed for city {city_id}: {e}")
+
+# Strong references to pending recomputes so they aren't garbage collected mid-flight
+_recompute_tasks = set()
+_recomputing_cities = set()
+
+def schedule_city_safety_recompute(city_id: str, db, evict: bool = True):
+    """
+    Recompute a city's index off the request path. Writes evict the cached value
+    first; stale reads keep serving it and skip cities already recomputing
+    """
+    if evict:
+        safety_cache.evict_city_safety_index(city_id)
+    elif city_id in _recomputing_cities:
+        return
+    
+    _recomputing_cities.add(city_id)
+    task = asyncio.create_task(_recompute_and_update(city_id, db))
+    _recompute_tasks.add(task)
+    task.add_done_callback(_recompute_tasks.discard)
+    task.add_done_callback(lambda _: _recomputing_cities.discard(city_id))
+
+def schedule_city_safety_index_write(city_id: str, safety_index: float, db):
+    """Write a freshly computed index back to the city without holding up the response"""
+    task = asyncio.create_task(_store_city_safety_index(city_id, safety_index, db))
+    _recompute_tasks.add(task)
+    task.add_done_callback(_recompute_tasks.discard)
+
 @router.post("/report", response_model=SafetyReportResponse)
 async def create_safety_report(
     report_data: SafetyReportCreate,
@@ -383,43 +767,37 @@ async def create_safety_report(
 ):
     """Create a new safety report"""
     
-    # Verify city exists
-    city = await db.city.find_unique(where={"id": report_data.city_id})
-    if not city:
+    try:
+        # The city FK replaces a separate existence check; the report and its
+        # token reward commit together
+        async with db.tx() as transaction:
+            report = await transaction.safetyreport.create(
+                data={
+                    "userId": current_user.id,
+                    "cityId": report_data.city_id,
+                    "latitude": report_data.latitude,
+                    "longitude": report_data.longitude,
+                    "type": report_data.type,
+                    "severity": report_data.severity,
+                    "description": report_data.description
+                }
+            )
+            
+            # Award tokens for contributing safety data
+            await transaction.user.update(
+                where={"id": current_user.id},
+                data={"tokens": {"increment": 5}}  # 5 tokens for safety report
+            )
+    except ForeignKeyViolationError:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="City not found"
         )
     
-    # Create safety report
-    report = await db.safetyreport.create(
-        data={
-            "userId": current_user.id,
-            "cityId": report_data.city_id,
-            "latitude": report_data.latitude,
-            "longitude": report_data.longitude,
-            "type": report_data.type,
-            "severity": report_data.severity,
-            "description": report_data.description
-        }
-    )
-    
-    # Award tokens for contributing safety data
-    await db.user.update(
-        where={"id": current_user.id},
-        data={"tokens": {"increment": 5}}  # 5 tokens for safety report
-    )
+    user_stats_cache.invalidate_user_stats(current_user.id)
     
-    # Recalculate city safety index
-    new_safety_index = await SafetyIndexCalculator.calculate_city_safety_index(
-        report_data.city_id, db
-    )
-    
-    # Update city safety index
-    await db.city.update(
-        where={"id": report_data.city_id},
-        data={"safetyIndex": new_safety_index}
-    )
+    # Recalculate city safety index in the background
+    schedule_city_safety_recompute(report_data.city_id, db)
     
     return SafetyReportResponse(
         id=report.id,
@@ -448,8 +826,31 @@ async def get_safety_reports(
 ):
     """Get safety reports with filtering"""
     
-    # Build where clause
     since_date = datetime.utcnow() - timedelta(days=days)
+    
+    if latitude is not None and longitude is not None and radius_km is not None:
+        # Filter by distance in SQL so skip/take page over reports inside the radius
+        bbox = bounding_box_filter(latitude, longitude, radius_km)
+        longitude_range = bbox.get("longitude", {})
+        rows = await db.query_raw(
+            NEARBY_SAFETY_REPORTS_SQL,
+            since_date,
+            city_id,
+            report_type.value if report_type else None,
+            verified_only,
+            bbox["latitude"]["gte"],
+            bbox["latitude"]["lte"],
+            longitude_range.get("gte"),
+            longitude_range.get("lte"),
+            latitude,
+            longitude,
+            radius_km * 1000,
+            limit,
+            offset
+        )
+        return [SafetyReportResponse(**row) for row in rows]
+    
+    # Build where clause
     where_clause = {
         "reportedAt": {"gte": since_date},
         "isActive": True
@@ -471,21 +872,6 @@ async def get_safety_reports(
         order={"reportedAt": "desc"}
     )
     
-    # Filter by distance if location provided
-    if latitude is not None and longitude is not None and radius_km is not None:
-        center_location = (latitude, longitude)
-        radius_meters = radius_km * 1000
-        
-        filtered_reports = []
-        for report in reports:
-            report_location = (report.latitude, report.longitude)
-            distance = geodesic(center_location, report_location).meters
-            
-            if distance <= radius_meters:
-                filtered_reports.append(report)
-        
-        reports = filtered_reports
-    
     return [
         SafetyReportResponse(
             id=report.id,
@@ -502,34 +888,42 @@ async def get_safety_reports(
     ]
 
 @router.get("/index/city/{city_id}")
-async def get_city_safety_index(city_id: str, db = Depends(get_db)):
+async def get_city_safety_index(
+    city_id: str,
+    cache_control: Optional[str] = Header(None),
+    db = Depends(get_db)
+):
     """Get current safety index for a city"""
     
-    city = await db.city.find_unique(where={"id": city_id})
+    # Load the city and the recent trend (last 7 days) together
+    seven_days_ago = datetime.utcnow() - timedelta(days=7)
+    city, type_rows = await asyncio.gather(
+        db.city.find_unique(where={"id": city_id}),
+        db.query_raw(CITY_REPORT_TYPE_COUNTS_SQL, city_id, seven_days_ago)
+    )
     if not city:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="City not found"
         )
     
-    # Calculate fresh safety index
-    safety_index = await SafetyIndexCalculator.calculate_city_safety_index(city_id, db)
+    # Serve the cached index, or a recently expired one while it recomputes in the
+    # background; Cache-Control: no-cache forces a fresh calculation
+    safety_index = safety_cache.get_city_safety_index(city_id)
+    if safety_index is None:
+        safety_index = safety_cache.get_city_safety_index(
+            city_id, max_stale=safety_cache.CITY_SAFETY_INDEX_STALE_SECONDS
+        )
+        if safety_index is not None:
+            schedule_city_safety_recompute(city_id, db, evict=False)
     
-    # Update city safety index
-    await db.city.update(
-        where={"id": city_id},
-        data={"safetyIndex": safety_index}
-    )
+    if safety_index is None or "no-cache" in (cache_control or "").lower():
+        safety_index = await cached_city_safety_index(city_id, db, refresh=True)
+        
+        # Update city safety index once the response is on its way
+        schedule_city_safety_index_write(city_id, safety_index, db)
     
-    # Get recent trend (last 7 days)
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    recent_reports = await db.safetyreport.find_many(
-        where={
-            "cityId": city_id,
-            "reportedAt": {"gte": seven_days_ago},
-            "isVerified": True
-        }
-    )
+    report_types = {row["report_type"]: row["report_count"] for row in type_rows}
     
     return {
         "city": {
@@ -541,11 +935,8 @@ async def get_city_safety_index(city_id: str, db = Depends(get_db)):
         "safety_level": get_safety_level(safety_index),
         "last_updated": datetime.utcnow().isoformat(),
         "trend": {
-            "recent_reports": len(recent_reports),
-            "report_types": {
-                report.type: len([r for r in recent_reports if r.type == report.type])
-                for report in recent_reports
-            } if recent_reports else {}
+            "recent_reports": sum(report_types.values()),
+            "report_types": report_types
         }
     }
 
@@ -558,10 +949,14 @@ async def get_area_safety_index(
 ):
     """Get safety index for a specific area"""
     
-    result = await SafetyIndexCalculator.calculate_area_safety_index(
-        latitude, longitude, radius_km, db
-    )
+    # Nearby requests share a result: the center is snapped to ~100m for the cache key
+    key = (round(latitude, 3), round(longitude, 3), radius_km)
+    cached = safety_cache.get_area_safety_index(key)
+    if cached is None:
+        cached = await SafetyIndexCalculator.calculate_area_safety_index(*key, db)
+        safety_cache.store_area_safety_index(key, cached)
     
+    result = dict(cached)
     result["safety_level"] = get_safety_level(result["safety_index"])
     result["location"] = {
         "latitude": latitude,
@@ -572,21 +967,15 @@ async def get_area_safety_index(
     
     return result
 
-@router.get("/heatmap/{city_id}")
-async def get_safety_heatmap(
-    city_id: str,
-    grid_size: float = Query(0.01, description="Grid cell size in degrees"),
-    days: int = Query(30, description="Days to analyze"),
-    db = Depends(get_db)
-):
-    """Get safety heatmap data for a city"""
+async def build_safety_heatmap(city_id: str, grid_size: float, days: int, db) -> Optional[bytes]:
+    """Render a city's safety heatmap as a JSON body, or None when the city doesn't exist"""
     
-    city = await db.city.find_unique(where={"id": city_id})
+    city = await db.city.find_unique(
+        where={"id": city_id},
+        select={"id": True, "name": True, "latitude": True, "longitude": True}
+    )
     if not city:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="City not found"
-        )
+        return None
     
     # Get recent reports in the city
     since_date = datetime.utcnow() - timedelta(days=days)
@@ -595,41 +984,46 @@ async def get_safety_heatmap(
             "cityId": city_id,
             "reportedAt": {"gte": since_date},
             "isVerified": True
-        }
+        },
+        select=REPORT_POINT_FIELDS
     )
     
-    # Create grid and calculate safety scores
-    grid_data = {}
+    # Snap every report to the grid at once and group the cells by a packed integer key
+    count = len(reports)
+    lats = np.fromiter((report.latitude for report in reports), dtype=np.float64, count=count)
+    lons = np.fromiter((report.longitude for report in reports), dtype=np.float64, count=count)
+    grid_lats = np.round(lats / grid_size).astype(np.int64)
+    grid_lons = np.round(lons / grid_size).astype(np.int64)
+    keys = (grid_lats << 32) | (grid_lons & 0xFFFFFFFF)
+    _, first_index, inverse, cell_counts = np.unique(
+        keys, return_index=True, return_inverse=True, return_counts=True
+    )
     
-    for report in reports:
-        # Snap to grid
-        grid_lat = round(report.latitude / grid_size) * grid_size
-        grid_lon = round(report.longitude / grid_size) * grid_size
-        grid_key = f"{grid_lat},{grid_lon}"
-        
-        if grid_key not in grid_data:
-            grid_data[grid_key] = {
-                "latitude": grid_lat,
-                "longitude": grid_lon,
-                "reports": [],
-                "safety_score": 0
-            }
-        
-        grid_data[grid_key]["reports"].append({
-            "type": report.type,
-            "severity": report.severity,
-            "reported_at": report.reportedAt
-        })
-    
-    # Calculate safety score for each grid cell
-    for grid_key, cell_data in grid_data.items():
-        cell_data["safety_score"] = SafetyIndexCalculator.calculate_reports_factor(
-            cell_data["reports"]
-        ) * 10
-        cell_data["report_count"] = len(cell_data["reports"])
-        del cell_data["reports"]  # Remove detailed reports from response
+    # Score each cell in the compiled kernel, one thread per block of cells, over the
+    # reports ordered by cell
+    order = np.argsort(inverse, kind="stable")
+    starts = np.zeros(len(cell_counts) + 1, dtype=np.int64)
+    np.cumsum(cell_counts, out=starts[1:])
+    cell_scores = _score_cells_kernel(
+        order, starts, *report_arrays(reports, utc_timestamp(datetime.utcnow()))
+    )
     
-    return {
+    grid_data = [
+        {
+            "latitude": grid_lat * grid_size,
+            "longitude": grid_lon * grid_size,
+            "safety_score": safety_score,
+            "report_count": cell_count
+        }
+        for grid_lat, grid_lon, safety_score, cell_count in zip(
+            grid_lats[first_index].tolist(),
+            grid_lons[first_index].tolist(),
+            cell_scores.tolist(),
+            cell_counts.tolist()
+        )
+    ]
+    
+    return orjson.dumps({
         "city": {
             "id": city.id,
             "name": city.name,
@@ -638,12 +1032,61 @@ async def get_safety_heatmap(
                 "longitude": city.longitude
             }
         },
-        "heatmap_data": list(grid_data.values()),
+        "heatmap_data": grid_data,
         "grid_size": grid_size,
         "analysis_period_days": days,
         "total_cells": len(grid_data),
         "generated_at": datetime.utcnow().isoformat()
-    }
+    })
+
+async def _refresh_heatmap(key: tuple, db):
+    """Rebuild a cached heatmap in the background"""
+    try:
+        body = await build_safety_heatmap(*key, db)
+        if body is not None:
+            safety_cache.store_heatmap(key, body)
+    except Exception as e:
+        logging.warning(f"Heatmap refresh failed for {key}: {e}")
+    finally:
+        _heatmap_refreshes.discard(key)
+
+# Heatmap keys with a background rebuild in flight, and strong references to the tasks
+_heatmap_refreshes = set()
+_heatmap_refresh_tasks = set()
+
+@router.get("/heatmap/{city_id}")
+async def get_safety_heatmap(
+    city_id: str,
+    grid_size: float = Query(0.01, gt=0, le=1.0, description="Grid cell size in degrees"),
+    days: int = Query(30, description="Days to analyze"),
+    if_none_match: Optional[str] = Header(None),
+    db = Depends(get_db)
+):
+    """Get safety heatmap data for a city"""
+    
+    key = (city_id, grid_size, days)
+    entry = safety_cache.get_heatmap(key)
+    
+    if entry is None:
+        body = await build_safety_heatmap(city_id, grid_size, days, db)
+        if body is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="City not found"
+            )
+        entry = safety_cache.store_heatmap(key, body)
+    elif entry[1] <= time.monotonic() and key not in _heatmap_refreshes:
+        # Serve the cached body and rebuild it off the request path
+        _heatmap_refreshes.add(key)
+        task = asyncio.create_task(_refresh_heatmap(key, db))
+        _heatmap_refresh_tasks.add(task)
+        task.add_done_callback(_heatmap_refresh_tasks.discard)
+    
+    _, _, body, etag, last_modified = entry
+    headers = {"ETag": etag, "Last-Modified": last_modified}
+    if if_none_match == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.post("/verify/{report_id}", response_model=MessageResponse)
 async def verify_safety_report(
@@ -672,15 +1115,12 @@ async def verify_safety_report(
         }
     )
     
-    # Recalculate city safety index
-    new_safety_index = await SafetyIndexCalculator.calculate_city_safety_index(
-        report.cityId, db
-    )
+    # Verification changes which reports area queries and heatmaps see
+    invalidate_recent_report_index()
+    safety_cache.evict_city_heatmaps(report.cityId)
     
-    await db.city.update(
-        where={"id": report.cityId},
-        data={"safetyIndex": new_safety_index}
-    )
+    # Recalculate city safety index in the background
+    schedule_city_safety_recompute(report.cityId, db)
     
     return MessageResponse(message="Safety report verification updated")
 
@@ -698,42 +1138,21 @@ async def scrape_location_news(
     """Scrape and analyze news articles for a specific location"""
     
     try:
-        # Import the news scraping agent
-        from app.services.news_scraping_agent import NewsScrapingAgent
-        
         # Default city/country if not provided
         if not city_name or not country:
             # Try to find nearest city in database
-            cities = await db.city.find_many(
-                where={"isActive": True},
-                take=10
-            )
+            closest_city, min_distance = await nearest_city(latitude, longitude, db)
             
-            if cities:
-                # Find closest city by distance
-                min_distance = float('inf')
-                closest_city = None
-                
-                for city in cities:
-                    distance = geodesic(
-                        (latitude, longitude), 
-                        (city.latitude, city.longitude)
-                    ).kilometers
-                    
-                    if distance < min_distance:
-                        min_distance = distance
-                        closest_city = city
-                
-                if closest_city and min_distance <= 100:  # Within 100km
-                    city_name = city_name or closest_city.name
-                    country = country or closest_city.country
+            if closest_city and min_distance <= 100:  # Within 100km
+                city_name = city_name or closest_city.name
+                country = country or closest_city.country
             
             # Fallback defaults
             city_name = city_name or "Local Area"
             country = country or "Global"
         
-        # Initialize and use news scraping agent
-        async with NewsScrapingAgent() as news_agent:
+        # Use the shared news scraping agent and its pooled HTTP session
+        async with news_agent:
             articles = await news_agent.scrape_location_news(
                 latitude=latitude,
                 longitude=longitude,
@@ -814,18 +1233,13 @@ async def scrape_location_news(
             detail=f"News scraping failed: {str(e)}"
         )
 
+# Safety index at which each descriptive level starts, and the levels in order
+SAFETY_LEVEL_THRESHOLDS = (2.0, 4.0, 6.0, 8.0)
+SAFETY_LEVELS = ("High Risk", "Caution", "Moderate", "Safe", "Very Safe")
+
 def get_safety_level(safety_index: float) -> str:
     """Convert numeric safety index to descriptive level"""
-    if safety_index >= 8.0:
-        return "Very Safe"
-    elif safety_index >= 6.0:
-        return "Safe"
-    elif safety_index >= 4.0:
-        return "Moderate"
-    elif safety_index >= 2.0:
-        return "Caution"
-    else:
-        return "High Risk"
+    return SAFETY_LEVELS[bisect_right(SAFETY_LEVEL_THRESHOLDS, safety_index)]
 
 
 # # ============================================================================
@@ -1,37 +1,118 @@
 from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
+import asyncio
+from prisma.errors import UniqueViolationError
 
 from app.core.database import get_db
+from app.core import user_stats_cache
 from app.api.routes.auth import get_current_user
 from app.models.schemas import (
     UserUpdate,
     UserResponse,
     UserBadgeResponse,
+    BadgeResponse,
+    BadgeType,
+    BadgeRarity,
     MessageResponse
 )
 
 router = APIRouter()
 
+# UserResponse field -> User column; friend lists select only these columns
+USER_RESPONSE_COLUMNS = {
+    "id": "id",
+    "username": "username",
+    "email": "email",
+    "profile_image_url": "profileImageUrl",
+    "total_xp": "totalXP",
+    "level": "level",
+    "streak_days": "streakDays",
+    "tokens": "tokens",
+    "is_verified": "isVerified",
+    "joined_at": "joinedAt",
+    "last_active_at": "lastActiveAt",
+    "name": "name",
+    "age": "age",
+    "gender": "gender"
+}
+USER_RESPONSE_FIELDS = {column: True for column in USER_RESPONSE_COLUMNS.values()}
+
+# UserUpdate field -> User column for profile updates
+USER_UPDATE_COLUMNS = {
+    "username": "username",
+    "email": "email",
+    "profile_image_url": "profileImageUrl",
+    "privacy_settings": "privacySettings",
+    "preferences": "preferences",
+    "name": "name",
+    "age": "age",
+    "gender": "gender"
+}
+
+# A user's badges joined to their badge details, newest first, with columns named
+# after the response fields so no nested Prisma objects are built
+USER_BADGES_SQL = '''
+    SELECT ub."id" AS id,
+           ub."mintedAt" AS minted_at,
+           b."id" AS badge_id,
+           b."name" AS name,
+           b."description" AS description,
+           b."type"::text AS type,
+           b."rarity"::text AS rarity,
+           b."imageUrl" AS image_url,
+           b."animationUrl" AS animation_url,
+           b."xpReward" AS xp_reward,
+           b."tokenReward" AS token_reward
+    FROM "user_badges" ub
+    JOIN "badges" b ON b."id" = ub."badgeId"
+    WHERE ub."userId" = $1
+    ORDER BY ub."mintedAt" DESC
+'''
+
+# Whether two users are already friends, as primary key probes on the implicit
+# join table; friendships are stored in both directions, so either row counts
+FRIENDSHIP_EXISTS_SQL = '''
+    SELECT 1 AS friends
+    FROM "_UserFriends"
+    WHERE ("A" = $1 AND "B" = $2) OR ("A" = $2 AND "B" = $1)
+    LIMIT 1
+'''
+
+# Distinct cities among a user's completed quests, counted in the database
+CITIES_VISITED_SQL = '''
+    SELECT count(DISTINCT q."cityId")::int AS cities_visited
+    FROM "quest_progress" qp
+    JOIN "quests" q ON q."id" = qp."questId"
+    WHERE qp."userId" = $1
+      AND qp."status" = 'completed'
+'''
+
+def _compile_user_to_response():
+    """
+    Generate the user -> UserResponse construction once at import, with every
+    attribute read written out inline instead of mapping columns per call
+    """
+    items = "".join(
+        f"        {field}=user.{column},\n"
+        for field, column in USER_RESPONSE_COLUMNS.items()
+    )
+    source = (
+        "def user_to_response(user):\n"
+        "    return UserResponse.model_construct(\n"
+        f"{items}        access_token=None\n"
+        "    )\n"
+    )
+    namespace: Dict[str, Any] = {"UserResponse": UserResponse}
+    exec(compile(source, "<user response projector>", "exec"), namespace)
+    return namespace["user_to_response"]
+
+# Project a user row onto UserResponse without re-validating DB-typed fields
+user_to_response = _compile_user_to_response()
+
 @router.get("/profile", response_model=UserResponse)
 async def get_user_profile(current_user = Depends(get_current_user)):
     """Get current user's profile"""
-    return UserResponse(
-        id=current_user.id,
-        username=current_user.username,
-        email=current_user.email,
-        profile_image_url=current_user.profileImageUrl,
-        total_xp=current_user.totalXP,
-        level=current_user.level,
-        streak_days=current_user.streakDays,
-        tokens=current_user.tokens,
-        is_verified=current_user.isVerified,
-        joined_at=current_user.joinedAt,
-        last_active_at=current_user.lastActiveAt,
-        access_token=None,
-        name=current_user.name,
-        age=current_user.age,
-        gender=current_user.gender
-    )
+    return user_to_response(current_user)
 
 @router.put("/profile", response_model=UserResponse)
 async def update_user_profile(
@@ -41,59 +122,39 @@ async def update_user_profile(
 ):
     """Update current user's profile"""
     
-    # Check if username is already taken (if updating username)
-    if user_update.username and user_update.username != current_user.username:
-        existing_user = await db.user.find_unique(
-            where={"username": user_update.username}
-        )
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username already taken"
-            )
-    
-    # Prepare update data
+    # Prepare update data from the fields that are set and differ from the stored values
     update_data = {}
-    if user_update.username is not None:
-        update_data["username"] = user_update.username
-    if user_update.email is not None:
-        update_data["email"] = user_update.email
-    if user_update.profile_image_url is not None:
-        update_data["profileImageUrl"] = user_update.profile_image_url
-    if user_update.privacy_settings is not None:
-        update_data["privacySettings"] = user_update.privacy_settings
-    if user_update.preferences is not None:
-        update_data["preferences"] = user_update.preferences
-    if user_update.name is not None:
-        update_data["name"] = user_update.name
-    if user_update.age is not None:
-        update_data["age"] = user_update.age
-    if user_update.gender is not None:
-        update_data["gender"] = user_update.gender
+    for field, column in USER_UPDATE_COLUMNS.items():
+        value = getattr(user_update, field)
+        if value is not None and value != getattr(current_user, column):
+            update_data[column] = value
     
-    # Update user
-    updated_user = await db.user.update(
-        where={"id": current_user.id},
-        data=update_data
-    )
+    # Nothing to change, so skip the write and echo the current profile
+    if not update_data:
+        return user_to_response(current_user)
     
-    return UserResponse(
-        id=updated_user.id,
-        username=updated_user.username,
-        email=updated_user.email,
-        profile_image_url=updated_user.profileImageUrl,
-        total_xp=updated_user.totalXP,
-        level=updated_user.level,
-        streak_days=updated_user.streakDays,
-        tokens=updated_user.tokens,
-        is_verified=updated_user.isVerified,
-        joined_at=updated_user.joinedAt,
-        last_active_at=updated_user.lastActiveAt,
-        access_token=None,
-        name=updated_user.name,
-        age=updated_user.age,
-        gender=updated_user.gender
-    )
+    # Update user; the updated row comes back from the same statement, and the
+    # unique indexes reject a username (or email) that is already taken
+    try:
+        updated_user = await db.user.update(
+            where={"id": current_user.id},
+            data=update_data
+        )
+    except UniqueViolationError as e:
+        # The engine names the violated field(s) or index in the error meta target
+        target = str((e.meta or {}).get("target", ""))
+        if "username" in target:
+            detail = "Username already taken"
+        elif "email" in target:
+            detail = "Email already registered"
+        else:
+            detail = "Username or email already taken"
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail
+        )
+    
+    return user_to_response(updated_user)
 
 @router.get("/badges", response_model=List[UserBadgeResponse])
 async def get_user_badges(
@@ -101,21 +162,28 @@ async def get_user_badges(
     db = Depends(get_db)
 ):
     """Get current user's badges (Digital Passport)"""
-    user_badges = await db.userbadge.find_many(
-        where={"userId": current_user.id},
-        include={"badge": True},
-        order={"mintedAt": "desc"}
-    )
+    rows = await db.query_raw(USER_BADGES_SQL, current_user.id)
     
     return [
-        UserBadgeResponse(
-            id=user_badge.id,
-            badge=user_badge.badge,
-            minted_at=user_badge.mintedAt,
-            token_id=user_badge.tokenId,
-            transaction_hash=user_badge.transactionHash
+        UserBadgeResponse.model_construct(
+            id=row["id"],
+            badge=BadgeResponse.model_construct(
+                id=row["badge_id"],
+                name=row["name"],
+                description=row["description"],
+                type=BadgeType(row["type"]),
+                rarity=BadgeRarity(row["rarity"]),
+                image_url=row["image_url"],
+                animation_url=row["animation_url"],
+                xp_reward=row["xp_reward"],
+                token_reward=row["token_reward"],
+                is_soulbound=False  # No longer blockchain-based
+            ),
+            minted_at=row["minted_at"],
+            token_id=None,
+            transaction_hash=None
         )
-        for user_badge in user_badges
+        for row in rows
     ]
 
 @router.get("/stats")
@@ -125,44 +193,41 @@ async def get_user_stats(
 ):
     """Get user statistics"""
     
-    # Count completed quests
-    completed_quests = await db.questprogress.count(
-        where={
-            "userId": current_user.id,
-            "status": "completed"
+    # Activity counts are cached briefly; the user fields come from the current user
+    stats = user_stats_cache.get_user_stats(current_user.id)
+    if stats is None:
+        # The stat queries are independent, so run them together:
+        # completed quests, total badges, cities visited (cities of completed quests)
+        # and safety reports submitted
+        completed_quests, total_badges, cities_rows, safety_reports = await asyncio.gather(
+            db.questprogress.count(
+                where={
+                    "userId": current_user.id,
+                    "status": "completed"
+                }
+            ),
+            db.userbadge.count(
+                where={"userId": current_user.id}
+            ),
+            db.query_raw(CITIES_VISITED_SQL, current_user.id),
+            db.safetyreport.count(
+                where={"userId": current_user.id}
+            )
+        )
+        stats = {
+            "completed_quests": completed_quests,
+            "total_badges": total_badges,
+            "cities_visited": int(cities_rows[0]["cities_visited"]) if cities_rows else 0,
+            "safety_reports_submitted": safety_reports
         }
-    )
-    
-    # Count total badges
-    total_badges = await db.userbadge.count(
-        where={"userId": current_user.id}
-    )
-    
-    # Count cities visited (quests completed in different cities)
-    cities_visited_query = await db.questprogress.find_many(
-        where={
-            "userId": current_user.id,
-            "status": "completed"
-        },
-        include={"quest": True},
-        distinct=["quest.cityId"]
-    )
-    cities_visited = len(set(qp.quest.cityId for qp in cities_visited_query))
-    
-    # Count safety reports submitted
-    safety_reports = await db.safetyreport.count(
-        where={"userId": current_user.id}
-    )
+        user_stats_cache.store_user_stats(current_user.id, stats)
     
     return {
         "total_xp": current_user.totalXP,
         "level": current_user.level,
         "streak_days": current_user.streakDays,
         "tokens": current_user.tokens,
-        "completed_quests": completed_quests,
-        "total_badges": total_badges,
-        "cities_visited": cities_visited,
-        "safety_reports_submitted": safety_reports,
+        **stats,
         "join_date": current_user.joinedAt
     }
 
@@ -192,14 +257,7 @@ async def add_friend(
         )
     
     # Check if already friends
-    existing_friendship = await db.user.find_first(
-        where={
-            "id": current_user.id,
-            "friends": {
-                "some": {"id": friend.id}
-            }
-        }
-    )
+    existing_friendship = await db.query_raw(FRIENDSHIP_EXISTS_SQL, current_user.id, friend.id)
     
     if existing_friendship:
         raise HTTPException(
@@ -207,21 +265,16 @@ async def add_friend(
             detail="Already friends with this user"
         )
     
-    # Add friend (bidirectional)
+    # Add friend (bidirectional): both sides of the self-relation connect in one
+    # write, so the friendship is never half-applied
     await db.user.update(
         where={"id": current_user.id},
         data={
             "friends": {
                 "connect": {"id": friend.id}
-            }
-        }
-    )
-    
-    await db.user.update(
-        where={"id": friend.id},
-        data={
-            "friends": {
-                "connect": {"id": current_user.id}
+            },
+            "friendOf": {
+                "connect": {"id": friend.id}
             }
         }
     )
@@ -234,28 +287,13 @@ async def get_friends(
     db = Depends(get_db)
 ):
     """Get user's friends list"""
-    user_with_friends = await db.user.find_unique(
-        where={"id": current_user.id},
-        include={"friends": True}
+    # Users on the friendOf side of the relation are the current user's friends
+    friends = await db.user.find_many(
+        where={"friendOf": {"some": {"id": current_user.id}}},
+        select=USER_RESPONSE_FIELDS
     )
     
     return [
-        UserResponse(
-            id=friend.id,
-            username=friend.username,
-            email=friend.email,
-            profile_image_url=friend.profileImageUrl,
-            total_xp=friend.totalXP,
-            level=friend.level,
-            streak_days=friend.streakDays,
-            tokens=friend.tokens,
-            is_verified=friend.isVerified,
-            joined_at=friend.joinedAt,
-            last_active_at=friend.lastActiveAt,
-            access_token=None,
-            name=friend.name,
-            age=friend.age,
-            gender=friend.gender
-        )
-        for friend in user_with_friends.friends
+        user_to_response(friend)
+        for friend in friends
     ]
\ No newline at end of file
@@ -38,6 +38,10 @@ class Settings(BaseSettings):
     SAFETY_INDEX_WEIGHT_REPORTS: float = Field(default=0.4, description="Weight for safety reports")
     SAFETY_INDEX_WEIGHT_TIME: float = Field(default=0.3, description="Weight for time decay")
     SAFETY_INDEX_WEIGHT_DENSITY: float = Field(default=0.3, description="Weight for report density")
+    SAFETY_REPORT_DECAY_DAYS: float = Field(default=30.0, description="Days over which a safety report's weight decays")
+    SAFETY_REPORT_MIN_WEIGHT: float = Field(default=0.1, description="Floor for a decayed safety report's weight")
+    SAFETY_MAX_FETCH: int = Field(default=5000, description="Page size for streaming safety reports and location proofs")
+    SAFETY_TREE_TTL: int = Field(default=300, description="Seconds before the in-memory recent safety report index is rebuilt")
     
     # Quest configuration
     DEFAULT_QUEST_RADIUS: float = Field(default=100.0, description="Default quest radius in meters")
@@ -0,0 +1,170 @@
+"""
+Geospatial helpers shared by the location-based routes
+"""
+import math
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+# Quest cell ids interleave 26 longitude and 26 latitude bits (an integer geohash),
+# so every coarser cell is a contiguous range of ids and fits a B-tree range scan
+CELL_AXIS_BITS = 26
+CELL_ID_BITS = 2 * CELL_AXIS_BITS
+
+KM_PER_DEGREE = 111.0
+
+try:
+    # Ahead-of-time build from scripts/build_geo_kernels.py; numpy below otherwise
+    from app.core._geo_kernels import haversine_vec as _haversine_vec
+except ImportError:
+    _haversine_vec = None
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Haversine distance in meters between two points. Plain floats and math calls
+    only, so numba can compile it (quests.py JITs it, scripts/build_geo_kernels.py
+    compiles it ahead of time)
+    """
+    R = 6371000.0  # Earth's radius in meters
+
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lon = math.radians(lon2 - lon1)
+
+    a = math.sin(delta_lat/2) * math.sin(delta_lat/2) + \
+        math.cos(lat1_rad) * math.cos(lat2_rad) * \
+        math.sin(delta_lon/2) * math.sin(delta_lon/2)
+
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+
+    return R * c
+
+def _axis_index(value: float, low: float, span: float, bits: int) -> int:
+    """Position of a coordinate on an axis split into 2**bits equal steps"""
+    steps = 1 << bits
+    return min(max(int((value - low) / span * steps), 0), steps - 1)
+
+def _interleave(lat_index: int, lon_index: int, bits: int) -> int:
+    """Interleave axis indices, longitude first as in geohash"""
+    cell = 0
+    for bit in range(bits - 1, -1, -1):
+        cell = (cell << 1) | ((lon_index >> bit) & 1)
+        cell = (cell << 1) | ((lat_index >> bit) & 1)
+    return cell
+
+def cell_id(latitude: float, longitude: float) -> int:
+    """Finest-level cell id for a point"""
+    return _interleave(
+        _axis_index(latitude, -90.0, 180.0, CELL_AXIS_BITS),
+        _axis_index(longitude, -180.0, 360.0, CELL_AXIS_BITS),
+        CELL_AXIS_BITS
+    )
+
+def haversine_distances(latitude: float, longitude: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Haversine distances in meters from one point to arrays of points, in one vectorized pass"""
+    if _haversine_vec is not None:
+        return _haversine_vec(
+            float(latitude), float(longitude),
+            np.ascontiguousarray(lats, dtype=np.float64),
+            np.ascontiguousarray(lons, dtype=np.float64)
+        )
+
+    R = 6371000.0  # Earth's radius in meters
+
+    lat_rad = np.radians(lats)
+    dlat = lat_rad - math.radians(latitude)
+    dlon = np.radians(lons) - math.radians(longitude)
+    a = np.sin(dlat / 2) ** 2 + \
+        math.cos(math.radians(latitude)) * np.cos(lat_rad) * np.sin(dlon / 2) ** 2
+
+    return 2 * R * np.arcsin(np.sqrt(a))
+
+def point_distances(rows: List[Any], latitude: float, longitude: float) -> np.ndarray:
+    """Distances in meters from a point to rows carrying .latitude/.longitude"""
+    lats = np.fromiter((row.latitude for row in rows), dtype=np.float64, count=len(rows))
+    lons = np.fromiter((row.longitude for row in rows), dtype=np.float64, count=len(rows))
+    return haversine_distances(latitude, longitude, lats, lons)
+
+def bounding_box_filter(latitude: float, longitude: float, radius_km: float) -> Dict[str, Any]:
+    """Prisma latitude/longitude range filters enclosing a search radius, for an index-backed prefilter"""
+    dlat = radius_km / KM_PER_DEGREE
+    filters = {"latitude": {"gte": latitude - dlat, "lte": latitude + dlat}}
+
+    # Longitude degrees shrink with latitude; skip the range near the poles or across the antimeridian
+    cos_lat = math.cos(math.radians(latitude))
+    if cos_lat > 1e-6:
+        dlon = radius_km / (KM_PER_DEGREE * cos_lat)
+        if -180.0 <= longitude - dlon and longitude + dlon <= 180.0:
+            filters["longitude"] = {"gte": longitude - dlon, "lte": longitude + dlon}
+
+    return filters
+
+def covering_cell_ranges(latitude: float, longitude: float, radius_km: float) -> List[Tuple[int, int]]:
+    """
+    Half-open cell id ranges covering a search radius: the cell containing the
+    point plus its neighbours, at the finest level whose cells span the radius
+    """
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-12)
+    cells_per_axis = min(180.0, 360.0 * cos_lat) * KM_PER_DEGREE / max(radius_km, 1e-9)
+    bits = min(int(math.log2(cells_per_axis)), CELL_AXIS_BITS) if cells_per_axis >= 1 else 0
+
+    steps = 1 << bits
+    lat_index = _axis_index(latitude, -90.0, 180.0, bits)
+    lon_index = _axis_index(longitude, -180.0, 360.0, bits)
+
+    # Neighbours clamp at the poles and wrap around the antimeridian
+    cells = {
+        _interleave(lat, lon % steps, bits)
+        for lat in range(max(lat_index - 1, 0), min(lat_index + 1, steps - 1) + 1)
+        for lon in (lon_index - 1, lon_index, lon_index + 1)
+    }
+
+    shift = CELL_ID_BITS - 2 * bits
+    return [(cell << shift, (cell + 1) << shift) for cell in sorted(cells)]
+
+def unit_vectors(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Points as (N, 3) xyz rows on the unit sphere"""
+    lat_rad = np.radians(lats)
+    lon_rad = np.radians(lons)
+    cos_lat = np.cos(lat_rad)
+    return np.stack([cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)], axis=-1)
+
+class SphereIndex:
+    """
+    Static point index on the unit sphere. Points are kept sorted by z (the sine of
+    their latitude), so a radius query binary-searches its latitude band and compares
+    chord lengths there, which order exactly like great-circle distances
+    """
+
+    def __init__(self, lats: np.ndarray, lons: np.ndarray):
+        xyz = unit_vectors(lats, lons)
+        self.order = np.argsort(xyz[:, 2], kind="stable")
+        self.xyz = xyz[self.order]
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def band(self, latitude: float, longitude: float, radius_m: float) -> Tuple[int, int, np.ndarray, float]:
+        """
+        Sorted-position range of the latitude band around a point, with the point's
+        unit vector and the squared chord length matching radius_m
+        """
+        R = 6371000.0  # Earth's radius in meters
+
+        angle = min(radius_m / R, math.pi)
+        lat_rad = math.radians(latitude)
+        z = self.xyz[:, 2]
+        start = int(np.searchsorted(z, math.sin(max(lat_rad - angle, -math.pi / 2)), side="left"))
+        stop = int(np.searchsorted(z, math.sin(min(lat_rad + angle, math.pi / 2)), side="right"))
+
+        center = unit_vectors(np.array([latitude]), np.array([longitude]))[0]
+        chord = 2 * math.sin(angle / 2)
+        return start, stop, center, chord * chord
+
+    def query_radius(self, latitude: float, longitude: float, radius_m: float) -> np.ndarray:
+        """Original positions of the points within radius_m of a point"""
+        start, stop, center, chord_sq = self.band(latitude, longitude, radius_m)
+        offsets = self.xyz[start:stop] - center
+        within = np.einsum("ij,ij->i", offsets, offsets) <= chord_sq
+        return self.order[start + np.flatnonzero(within)]
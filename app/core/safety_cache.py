@@ -0,0 +1,105 @@
+"""
+In-process TTL caches of computed safety indexes, news factors and heatmaps
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any, Dict, Optional, Tuple
+
+CITY_SAFETY_INDEX_TTL_SECONDS = 60
+CITY_SAFETY_INDEX_STALE_SECONDS = 300  # Expired indexes may still be served while they recompute
+CITY_SAFETY_INDEX_CACHE_MAX_ENTRIES = 4096
+
+# city id -> (expires_at on the monotonic clock, safety index)
+cache: Dict[str, Tuple[float, float]] = {}
+
+def get_city_safety_index(city_id: str, max_stale: float = 0.0) -> Optional[float]:
+    """Cached safety index for a city, or None when missing or expired for longer than max_stale seconds"""
+    entry = cache.get(city_id)
+    if entry is None or entry[0] + max_stale <= time.monotonic():
+        return None
+    return entry[1]
+
+def store_city_safety_index(city_id: str, safety_index: float) -> None:
+    """Cache a freshly computed safety index for the TTL"""
+    if len(cache) >= CITY_SAFETY_INDEX_CACHE_MAX_ENTRIES:
+        cache.clear()
+    cache[city_id] = (time.monotonic() + CITY_SAFETY_INDEX_TTL_SECONDS, safety_index)
+
+def evict_city_safety_index(city_id: str) -> None:
+    """Drop a city's cached index after its reports change"""
+    cache.pop(city_id, None)
+
+# News changes slowly, so news factors are kept longer than the indexes built on them
+NEWS_FACTOR_TTL_SECONDS = 300
+AREA_SAFETY_INDEX_TTL_SECONDS = 60
+AREA_CACHE_MAX_ENTRIES = 4096
+
+# (city id, rounded latitude, rounded longitude) -> (expires_at, news factor)
+news_factor_cache: Dict[Tuple[str, float, float], Tuple[float, float]] = {}
+
+# (rounded latitude, rounded longitude, radius km) -> (expires_at, area safety result)
+area_safety_index_cache: Dict[Tuple[float, float, float], Tuple[float, Dict[str, Any]]] = {}
+
+def get_news_factor(key: Tuple[str, float, float]) -> Optional[float]:
+    """Cached news factor, or None when missing or expired"""
+    entry = news_factor_cache.get(key)
+    if entry is None or entry[0] <= time.monotonic():
+        return None
+    return entry[1]
+
+def store_news_factor(key: Tuple[str, float, float], news_factor: float) -> None:
+    """Cache a computed news factor for the TTL"""
+    if len(news_factor_cache) >= AREA_CACHE_MAX_ENTRIES:
+        news_factor_cache.clear()
+    news_factor_cache[key] = (time.monotonic() + NEWS_FACTOR_TTL_SECONDS, news_factor)
+
+def get_area_safety_index(key: Tuple[float, float, float]) -> Optional[Dict[str, Any]]:
+    """Cached area safety result, or None when missing or expired"""
+    entry = area_safety_index_cache.get(key)
+    if entry is None or entry[0] <= time.monotonic():
+        return None
+    return entry[1]
+
+def store_area_safety_index(key: Tuple[float, float, float], result: Dict[str, Any]) -> None:
+    """Cache a computed area safety result for the TTL"""
+    if len(area_safety_index_cache) >= AREA_CACHE_MAX_ENTRIES:
+        area_safety_index_cache.clear()
+    area_safety_index_cache[key] = (time.monotonic() + AREA_SAFETY_INDEX_TTL_SECONDS, result)
+
+# Heatmaps are served from cache for the TTL and rebuilt in the background once
+# they are older than the refresh interval
+HEATMAP_TTL_SECONDS = 600
+HEATMAP_REFRESH_SECONDS = 300
+HEATMAP_CACHE_MAX_ENTRIES = 1024
+
+# (city id, grid size, days) -> (expires_at, refresh_at, JSON body, ETag, Last-Modified)
+heatmap_cache: Dict[Tuple[str, float, int], Tuple[float, float, bytes, str, str]] = {}
+
+def get_heatmap(key: Tuple[str, float, int]) -> Optional[Tuple[float, float, bytes, str, str]]:
+    """Cached heatmap entry, or None when missing or expired"""
+    entry = heatmap_cache.get(key)
+    if entry is None or entry[0] <= time.monotonic():
+        return None
+    return entry
+
+def store_heatmap(key: Tuple[str, float, int], body: bytes) -> Tuple[float, float, bytes, str, str]:
+    """Cache a rendered heatmap body with validators for conditional requests"""
+    if len(heatmap_cache) >= HEATMAP_CACHE_MAX_ENTRIES:
+        heatmap_cache.clear()
+    now = time.monotonic()
+    entry = (
+        now + HEATMAP_TTL_SECONDS,
+        now + HEATMAP_REFRESH_SECONDS,
+        body,
+        f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+        format_datetime(datetime.now(timezone.utc), usegmt=True)
+    )
+    heatmap_cache[key] = entry
+    return entry
+
+def evict_city_heatmaps(city_id: str) -> None:
+    """Drop every cached heatmap of a city after its verified reports change"""
+    for key in [key for key in heatmap_cache if key[0] == city_id]:
+        heatmap_cache.pop(key, None)
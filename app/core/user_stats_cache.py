@@ -0,0 +1,28 @@
+"""
+In-process TTL cache of per-user activity counts behind the stats endpoint
+"""
+import time
+from typing import Any, Dict, Optional, Tuple
+
+USER_STATS_TTL_SECONDS = 30
+USER_STATS_CACHE_MAX_ENTRIES = 10000
+
+# user id -> (expires_at on the monotonic clock, counts)
+cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+def get_user_stats(user_id: str) -> Optional[Dict[str, Any]]:
+    """Cached counts for a user, or None when missing or expired"""
+    entry = cache.get(user_id)
+    if entry is None or entry[0] <= time.monotonic():
+        return None
+    return entry[1]
+
+def store_user_stats(user_id: str, stats: Dict[str, Any]) -> None:
+    """Cache freshly counted stats for the TTL"""
+    if len(cache) >= USER_STATS_CACHE_MAX_ENTRIES:
+        cache.clear()
+    cache[user_id] = (time.monotonic() + USER_STATS_TTL_SECONDS, stats)
+
+def invalidate_user_stats(user_id: str) -> None:
+    """Drop a user's cached counts after they complete a quest, earn a badge or report"""
+    cache.pop(user_id, None)
@@ -20,7 +20,6 @@ from textblob import TextBlob
 from langchain.schema import Document
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
-from geopy.distance import geodesic
 
 from app.core.config import settings
 
@@ -37,6 +36,33 @@ except LookupError:
     nltk.download('stopwords')
 
 
+# One HTTP session for every scrape, so feeds and APIs on the same hosts reuse
+# pooled keep-alive connections and cached DNS instead of reconnecting per job
+_http_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Shared scraping session, created on first use inside the running event loop"""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300, keepalive_timeout=30),
+            timeout=aiohttp.ClientTimeout(total=30),
+            headers={
+                'User-Agent': 'SoloMate-NewsAgent/1.0 (Safety Research Bot)'
+            }
+        )
+    return _http_session
+
+
+async def close_http_session():
+    """Close the shared scraping session on application shutdown"""
+    global _http_session
+    if _http_session is not None:
+        await _http_session.close()
+        _http_session = None
+
+
 class NewsScrapingAgent:
     """Advanced news scraping agent for location-based safety intelligence"""
     
@@ -76,19 +102,13 @@ class NewsScrapingAgent:
         }
 
     async def __aenter__(self):
-        """Async context manager entry"""
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=30),
-            headers={
-                'User-Agent': 'SoloMate-NewsAgent/1.0 (Safety Research Bot)'
-            }
-        )
+        """Async context manager entry; borrows the shared HTTP session"""
+        self.session = get_http_session()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit"""
-        if self.session:
-            await self.session.close()
+        """Async context manager exit; the shared session stays open for the next scrape"""
+        pass
 
     async def scrape_location_news(
         self,
@@ -11,9 +11,9 @@ from datetime import datetime
 load_dotenv()
 
 from app.core.database import init_db
-from app.api.routes import auth, users, cities, quests, badges, safety, leaderboards, ai_recommendations, exploration, journal
-from app.api.routes import auth, users, cities, quests, badges, safety, leaderboards, ai_recommendations, exploration, itinerary, preferences, emergency_contacts
+from app.api.routes import auth, users, cities, quests, badges, safety, leaderboards, ai_recommendations, exploration, journal, itinerary, preferences, emergency_contacts
 from app.core.config import settings
+from app.services.news_scraping_agent import close_http_session
 
 security = HTTPBearer()
 
@@ -23,7 +23,7 @@ async def lifespan(app: FastAPI):
     await init_db()
     yield
     # Shutdown
-    pass
+    await close_http_session()
 
 app = FastAPI(
     title="SoloMate Backend API",
@@ -84,4 +84,5 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run('main:app', host="localhost", port=8000, reload=True)
\ No newline at end of file
+    # loop="auto" runs on uvloop and http="auto" on httptools wherever they are installed
+    uvicorn.run('main:app', host="localhost", port=8000, reload=True, loop="auto", http="auto")
\ No newline at end of file
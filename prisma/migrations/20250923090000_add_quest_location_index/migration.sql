@@ -0,0 +1,2 @@
+-- CreateIndex
+CREATE INDEX "quests_latitude_longitude_idx" ON "public"."quests"("latitude", "longitude");
@@ -0,0 +1,15 @@
+-- AlterTable
+ALTER TABLE "public"."quests" ADD COLUMN     "cellId" BIGINT;
+
+-- Backfill: interleave 26 longitude and 26 latitude bits, longitude first (see app/core/geo.py)
+UPDATE "public"."quests" q SET "cellId" = (
+    SELECT SUM((((c.lat_index >> b) & 1) << (2 * b)) | (((c.lon_index >> b) & 1) << (2 * b + 1)))::BIGINT
+    FROM (
+        SELECT LEAST(GREATEST(FLOOR((q."latitude" + 90) / 180 * 67108864), 0), 67108863)::BIGINT AS lat_index,
+               LEAST(GREATEST(FLOOR((q."longitude" + 180) / 360 * 67108864), 0), 67108863)::BIGINT AS lon_index
+    ) c,
+    generate_series(0, 25) AS b
+);
+
+-- CreateIndex
+CREATE INDEX "quests_cellId_idx" ON "public"."quests"("cellId");
@@ -0,0 +1,5 @@
+-- CreateIndex
+CREATE INDEX "location_proofs_latitude_longitude_timestamp_idx" ON "public"."location_proofs"("latitude", "longitude", "timestamp");
+
+-- CreateIndex
+CREATE INDEX "safety_reports_latitude_longitude_reportedAt_idx" ON "public"."safety_reports"("latitude", "longitude", "reportedAt");
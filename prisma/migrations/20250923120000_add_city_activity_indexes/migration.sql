@@ -0,0 +1,5 @@
+-- CreateIndex
+CREATE INDEX "quest_progress_questId_userId_idx" ON "public"."quest_progress"("questId", "userId");
+
+-- CreateIndex
+CREATE INDEX "quests_cityId_idx" ON "public"."quests"("cityId");
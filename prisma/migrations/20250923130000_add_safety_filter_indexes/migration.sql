@@ -0,0 +1,8 @@
+-- CreateIndex
+CREATE INDEX "users_lastActiveAt_idx" ON "public"."users"("lastActiveAt");
+
+-- CreateIndex
+CREATE INDEX "location_proofs_isVerified_timestamp_idx" ON "public"."location_proofs"("isVerified", "timestamp");
+
+-- CreateIndex
+CREATE INDEX "safety_reports_cityId_isVerified_reportedAt_idx" ON "public"."safety_reports"("cityId", "isVerified", "reportedAt" DESC);
@@ -0,0 +1,2 @@
+-- CreateIndex
+CREATE INDEX "quest_progress_userId_status_idx" ON "public"."quest_progress"("userId", "status");
@@ -0,0 +1,50 @@
+"""
+Compile the geo distance kernels ahead of time into app/core/_geo_kernels.
+
+Run once per build/deploy image:
+
+    python scripts/build_geo_kernels.py
+
+quests.py (haversine_m) and app/core/geo.py (haversine_vec) import the compiled
+module when it is present and fall back to numba's JIT / numpy otherwise, so
+every worker skips compilation on cold start.
+
+numba.pycc is deprecated and scheduled for removal; once the installed numba
+drops it this script exits with an error instead of building, and the app
+keeps running on the fallbacks.
+"""
+import os
+import sys
+
+import numpy as np
+from numba import njit
+
+try:
+    from numba.pycc import CC
+except ImportError:
+    sys.exit(
+        "numba.pycc is not available in this numba release (it is deprecated); "
+        "skipping the AOT build, the app falls back to JIT-compiled kernels"
+    )
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.core.geo import haversine_m  # noqa: E402
+
+cc = CC("_geo_kernels")
+cc.output_dir = os.path.join(ROOT, "app", "core")
+cc.export("haversine_m", "f8(f8, f8, f8, f8)")(haversine_m)
+
+_haversine_m = njit(haversine_m)
+
+@cc.export("haversine_vec", "f8[:](f8, f8, f8[:], f8[:])")
+def haversine_vec(latitude, longitude, lats, lons):
+    """Same contract as app.core.geo.haversine_distances, one compiled loop"""
+    distances = np.empty(lats.shape[0])
+    for i in range(lats.shape[0]):
+        distances[i] = _haversine_m(latitude, longitude, lats[i], lons[i])
+    return distances
+
+if __name__ == "__main__":
+    cc.compile()